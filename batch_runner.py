@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Kindle自動テキスト抽出システム - 連続実行（無人運転）
+
+ジョブファイルに並べた書籍を対話なしで順番に処理し、書籍ごとの結果を
+output/batch_summary.json に書き出す（1冊終わるごとに更新）。
+Kindleアプリの起動とGoogle Driveの認証は最初の1回だけ行い、2冊目以降は使い回す。
+
+使い方:
+    python3 batch_runner.py jobs.json
+
+ジョブファイルの例:
+    {
+      "books": [
+        {"title": "書籍A", "asin": "B0XXXXXXXX"},
+        {"title": "書籍B", "asin": "B0YYYYYYYY", "max_pages": 200}
+      ]
+    }
+
+    title:     書籍タイトル（出力フォルダ名・Google Driveのフォルダ名に使用）
+    asin:      kindle:// リンクで書籍を開く（2冊目以降は必須。1冊目だけは省略すると表示中の書籍を処理）
+    max_pages: 処理するページ数の上限（省略時は自動検出）
+    resume:    中断した実行があれば続きから再開する（既定: true）
+    force:     完了済みの書籍も最初から処理し直す（既定: false）
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+from dataclasses import dataclass, asdict
+
+# プロジェクトのルートディレクトリをPythonパスに追加
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from config import Config
+import google_drive_manager
+from kindle_automation import KindleAutomation
+from checkpoint_journal import CheckpointJournal
+from run import run_preflight_check
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class BookJob:
+    """ジョブファイルの1冊分の指定"""
+    title: str
+    asin: str = None
+    max_pages: int = None
+    resume: bool = True
+    force: bool = False
+
+
+@dataclass
+class BookResult:
+    """1冊分の処理結果（status: completed / failed / skipped / interrupted）"""
+    title: str
+    status: str
+    output_folder: str
+    pages: int = 0
+    ocr_done: int = 0
+    uploaded: int = 0
+    elapsed_seconds: float = 0.0
+    pages_per_minute: float = 0.0
+    error: str = None
+
+
+def load_jobs(job_path):
+    """ジョブファイル（JSON）を読み込んで BookJob のリストを返す"""
+    with open(job_path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    entries = data.get('books', []) if isinstance(data, dict) else data
+
+    jobs = []
+    for number, entry in enumerate(entries, 1):
+        if isinstance(entry, str):
+            entry = {'title': entry}
+        title = str(entry.get('title') or '').strip()
+        if not title:
+            raise ValueError(f"{number}冊目に title がありません")
+        if number > 1 and not entry.get('asin'):
+            # 省略すると前の書籍の最終ページを新しいタイトルとして撮影してしまう
+            raise ValueError(f"{title}: 2冊目以降は asin を指定してください")
+        max_pages = entry.get('max_pages')
+        if max_pages is not None and (not isinstance(max_pages, int) or max_pages <= 0):
+            raise ValueError(f"{title}: max_pages は1以上の整数で指定してください")
+        jobs.append(BookJob(
+            title=title,
+            asin=entry.get('asin') or None,
+            max_pages=max_pages,
+            resume=bool(entry.get('resume', True)),
+            force=bool(entry.get('force', False)),
+        ))
+    if not jobs:
+        raise ValueError("ジョブファイルに書籍がありません")
+    return jobs
+
+
+class BatchRunner:
+    """複数の書籍を順番に処理する
+
+    KindleAutomation を1つだけ作って書籍ごとに出力先を切り替えるので、
+    Kindleアプリの起動待ち・ウィンドウ状態・OCRキャッシュ・Google Driveの認証とクライアントは
+    書籍をまたいで使い続けられる。1冊が失敗しても次の書籍に進む。
+    """
+
+    def __init__(self, jobs, summary_path=Config.BATCH_SUMMARY_FILE, automation=None):
+        self.jobs = jobs
+        self.summary_path = summary_path
+        self.automation = automation or KindleAutomation()
+        self.results = []
+        self.started_at = time.time()
+
+    def run(self):
+        """全書籍を処理して結果のリストを返す（Ctrl+C で中断した場合も集計を書き出す）"""
+        google_drive_manager.warm_up(self.automation.config)
+        for number, job in enumerate(self.jobs, 1):
+            logger.info(f"📚 [{number}/{len(self.jobs)}] {job.title}")
+            started = time.time()
+            try:
+                result = self.run_job(job)
+            except KeyboardInterrupt:
+                # 中断までの進捗（撮影・OCR・アップロード済みページ数）はジャーナルから集計する
+                journal = self.automation.journal or CheckpointJournal(self.automation.config.OUTPUT_FOLDER)
+                self.results.append(self._result(job, 'interrupted', started, journal))
+                self.write_summary()
+                raise
+            self.results.append(result)
+            self.write_summary()
+            logger.info(f"📚 [{number}/{len(self.jobs)}] {job.title}: {result.status}"
+                        f"（{result.pages}ページ, {result.elapsed_seconds:.0f}秒）")
+        return self.results
+
+    def run_job(self, job):
+        """1冊を処理して BookResult を返す"""
+        automation = self.automation
+        automation.set_book(job.title)
+        started = time.time()
+
+        journal = CheckpointJournal(automation.config.OUTPUT_FOLDER)
+        if journal.completed and not job.force:
+            logger.info(f"完了済みの書籍のためスキップします: {job.title}")
+            return self._result(job, 'skipped', started, journal)
+
+        if job.asin and not automation.open_book(job.asin):
+            return self._result(job, 'failed', started, journal, error="書籍を開けませんでした")
+
+        try:
+            success = automation.run_full_automation(job.max_pages, resume=job.resume and not job.force)
+            error = None if success else "処理中にエラーが発生しました（ログを確認してください）"
+        except Exception as e:
+            success, error = False, str(e)
+        return self._result(job, 'completed' if success else 'failed', started,
+                            automation.journal or journal, error)
+
+    def _result(self, job, status, started, journal, error=None):
+        """ジャーナルの記録から書籍ごとの集計を作る"""
+        pages = list(journal.pages.values())
+        elapsed = time.time() - started
+        result = BookResult(
+            title=job.title,
+            status=status,
+            output_folder=self.automation.config.OUTPUT_FOLDER,
+            pages=len(pages),
+            ocr_done=sum(1 for page in pages if page['ocr']),
+            uploaded=sum(1 for page in pages if page['uploaded']),
+            elapsed_seconds=round(elapsed, 1),
+            error=error,
+        )
+        if status != 'skipped' and elapsed > 0:
+            result.pages_per_minute = round(len(pages) / elapsed * 60, 1)
+        return result
+
+    def write_summary(self):
+        """書籍ごとの結果をJSONに書き出す（途中で止まってもそこまでの結果が残るよう毎回置き換える）"""
+        summary = {
+            'started_at': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(self.started_at)),
+            'updated_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'books': [asdict(result) for result in self.results],
+        }
+        try:
+            summary_dir = os.path.dirname(self.summary_path)
+            if summary_dir:
+                os.makedirs(summary_dir, exist_ok=True)
+            temp_path = self.summary_path + ".tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(summary, f, ensure_ascii=False, indent=2)
+            os.replace(temp_path, self.summary_path)
+        except Exception as e:
+            logger.error(f"連続実行の結果を保存できませんでした: {e}")
+
+
+def print_summary(results):
+    """書籍ごとの結果を一覧表示"""
+    icons = {'completed': '✅', 'failed': '❌', 'skipped': '⏭️ ', 'interrupted': '⏹️ '}
+    print()
+    print("📋 連続実行の結果:")
+    for result in results:
+        line = (f"{icons.get(result.status, '•')} {result.title}: {result.pages}ページ"
+                f"（OCR {result.ocr_done}, アップロード {result.uploaded}, {result.elapsed_seconds:.0f}秒）")
+        if result.error:
+            line += f" - {result.error}"
+        print(line)
+    completed = sum(1 for result in results if result.status == 'completed')
+    print(f"📚 完了: {completed}/{len(results)}冊")
+
+
+def main():
+    args = sys.argv[1:]
+    if not args:
+        print(__doc__)
+        return
+
+    try:
+        jobs = load_jobs(args[0])
+    except (OSError, ValueError) as e:
+        print(f"❌ ジョブファイルを読み込めません: {e}")
+        sys.exit(2)
+
+    print("🚀 Kindle自動テキスト抽出システム（連続実行）")
+    print(f"📚 {len(jobs)}冊を順番に処理します")
+    print()
+
+    # 認証の問題は最初の書籍に入る前に検出する（夜間に途中で止まらないように）
+    if not run_preflight_check():
+        sys.exit(1)
+    print()
+
+    runner = BatchRunner(jobs)
+    try:
+        runner.run()
+    except KeyboardInterrupt:
+        print()
+        print("⏹️  連続実行が中断されました")
+    print_summary(runner.results)
+    print(f"📁 結果: {runner.summary_path}")
+    sys.exit(0 if all(result.status in ('completed', 'skipped') for result in runner.results) else 1)
+
+
+if __name__ == "__main__":
+    main()
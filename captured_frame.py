@@ -0,0 +1,19 @@
+import time
+from dataclasses import dataclass, field
+
+
+@dataclass
+class CapturedFrame:
+    """画面から取得した1フレーム
+
+    ページめくりの確認に使ったフレームをそのままページ画像として
+    保存できるよう、取得時刻と（保存時に決まる）ページ番号を持ち回る。
+    """
+    image: object  # PIL画像またはNumPy配列（4チャンネルはBGRA、3チャンネルはRGB）
+    timestamp: float = field(default_factory=time.time)
+    page_index: int = None
+
+    @property
+    def age(self):
+        """取得からの経過秒数"""
+        return time.time() - self.timestamp
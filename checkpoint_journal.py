@@ -0,0 +1,147 @@
+import os
+import json
+import time
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class CheckpointJournal:
+    """書籍ごとの追記型チェックポイントジャーナル（JSON Lines）
+
+    ページごとの撮影・OCR・アップロードの完了を1行ずつ追記する。
+    途中で異常終了しても、次回はジャーナルを再生して完了済みの作業を飛ばし、
+    最後に確認できたページの続きから撮影を再開できる。
+
+    新しい実行を始めるときは run_start を追記し、再生時はそれ以前の記録を無視する
+    （書き込み途中で途切れた最終行を切り詰める以外、既存の記録は書き換えない）。
+    """
+
+    JOURNAL_FILENAME = "journal.jsonl"
+
+    def __init__(self, book_folder):
+        os.makedirs(book_folder, exist_ok=True)
+        self.path = os.path.join(book_folder, self.JOURNAL_FILENAME)
+        self._lock = threading.Lock()
+        self._reset_state()
+        self._replay()
+
+    def _reset_state(self):
+        self.pages = {}  # ファイル名 -> {'index', 'hash', 'ocr', 'uploaded'}
+        self.direction = None
+        self.completed = False
+        self.run_count = 0
+
+    def _replay(self):
+        """ジャーナルを読み込んで状態を復元"""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line_number, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    self._apply(json.loads(line))
+                except (ValueError, KeyError) as e:
+                    # 書き込み途中で落ちた最終行などは読み飛ばす
+                    logger.warning(f"ジャーナル{line_number}行目を読み飛ばします: {e}")
+        self._truncate_partial_line()
+
+    def _truncate_partial_line(self):
+        """改行で終わっていない最終行（書き込み途中）を切り詰め、追記が壊れないようにする"""
+        with open(self.path, 'rb+') as f:
+            data = f.read()
+            if not data or data.endswith(b'\n'):
+                return
+            f.truncate(data.rfind(b'\n') + 1)
+
+    def _apply(self, record):
+        """1件の記録を状態に反映"""
+        event = record['event']
+        if event == 'run_start':
+            if not record.get('resume'):
+                self._reset_state()
+            self.run_count += 1
+            self.completed = False
+        elif event == 'direction':
+            self.direction = record['direction']
+        elif event == 'capture':
+            self.pages[record['file']] = {
+                'index': record['page'],
+                'hash': record.get('hash'),
+                'ocr': False,
+                'uploaded': None,
+            }
+        elif event == 'ocr':
+            if record['file'] in self.pages:
+                self.pages[record['file']]['ocr'] = record.get('ok', True)
+        elif event == 'upload':
+            if record['file'] in self.pages:
+                self.pages[record['file']]['uploaded'] = record['file_id']
+        elif event == 'complete':
+            self.completed = True
+
+    def _append(self, event, **fields):
+        """記録を追記してディスクに反映"""
+        record = {'event': event, 'ts': time.time(), **fields}
+        with self._lock:
+            self._apply(record)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record, ensure_ascii=False) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+
+    @property
+    def can_resume(self):
+        """再開できる未完了の実行があるか"""
+        return bool(self.pages) and not self.completed
+
+    def start_run(self, resume=False):
+        """実行の開始を記録（resume=False の場合はそれまでの記録を無効化）"""
+        self._append('run_start', resume=resume)
+
+    def record_direction(self, direction):
+        self._append('direction', direction=direction)
+
+    def record_capture(self, page_index, filename, page_hash=None):
+        self._append('capture', page=page_index, file=filename,
+                     hash=f"{page_hash:x}" if page_hash is not None else None)
+
+    def record_ocr(self, filename, ok=True):
+        self._append('ocr', file=filename, ok=ok)
+
+    def record_upload(self, filename, file_id):
+        self._append('upload', file=filename, file_id=file_id)
+
+    def record_complete(self):
+        self._append('complete')
+
+    def captured_files(self):
+        """撮影済みページのファイル名をページ順に返す"""
+        return sorted(self.pages, key=lambda name: self.pages[name]['index'])
+
+    def next_page_index(self):
+        """次に撮影するページ番号"""
+        if not self.pages:
+            return 0
+        return max(page['index'] for page in self.pages.values()) + 1
+
+    def missing_page_indexes(self):
+        """撮影済みの範囲で欠けているページ番号（画像の保存に失敗したページ）"""
+        captured = {page['index'] for page in self.pages.values()}
+        return [index for index in range(self.next_page_index()) if index not in captured]
+
+    def page_hashes(self):
+        """撮影済みページの (ファイル名, ハッシュ) をページ順に返す"""
+        return [(name, int(self.pages[name]['hash'], 16))
+                for name in self.captured_files() if self.pages[name]['hash']]
+
+    def is_uploaded(self, filename):
+        page = self.pages.get(filename)
+        return bool(page and page['uploaded'])
+
+    def is_ocr_done(self, filename):
+        page = self.pages.get(filename)
+        return bool(page and page['ocr'])
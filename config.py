@@ -6,8 +6,43 @@ load_dotenv()
 class Config:
     # Kindle設定
     KINDLE_APP_NAME = "Kindle"  # macOSの場合
+    KINDLE_PROCESS_NAME = "Amazon Kindle"  # AppleScriptで操作するプロセス名
+    KINDLE_WINDOW_BOUNDS = (0, 0, 1920, 1080)  # ウィンドウの位置とサイズ (x, y, 幅, 高さ)
+    FOCUS_CHECK_INTERVAL = 2.0  # フォーカス状態の確認結果をキャッシュする時間（秒）
+    CAPTURE_BACKEND = "pyautogui"  # 画面取得方式（pyautogui: 従来の方式, mss: メモリ上に直接取得して高速・実機での検証後に切り替える）。mss が未インストールなら pyautogui
+    CAPTURE_WINDOW_ONLY = True  # mss の場合、KINDLE_WINDOW_BOUNDS の範囲だけを取得する
+    # 操作ごとの待機時間（秒）。pyautogui.PAUSE による一律の待機の代わりに使用
+    ACTION_DELAYS = {
+        'press': 0.05,
+        'hotkey': 0.2,
+    }
     PAGE_TURN_DELAY = 4  # ページめくり後の待機時間（秒）
-    SCREENSHOT_DELAY = 1  # スクリーンショット撮影後の待機時間（秒）
+    BOOK_OPEN_WAIT = 8  # kindle:// リンクで書籍を開いた後の待機時間（秒、連続実行用）
+    
+    # 適応的ページめくり設定（描画完了を検出して固定待機を省く）
+    ADAPTIVE_PAGE_TURN = True  # Falseの場合は PAGE_TURN_DELAY の固定待機
+    PAGE_TURN_POLL_INTERVAL = 0.15  # フレーム取得間隔（秒）
+    PAGE_TURN_TIMEOUT = 4  # ページ変化を待つ最大時間（秒）
+    PAGE_TURN_STABLE_FRAMES = 2  # 変化後、この回数連続で差がなければ描画完了
+    PAGE_TURN_STABLE_THRESHOLD = 0.995  # 連続フレームを「差なし」とみなす類似度
+    
+    # ページ比較設定
+    PAGE_DIFF_SIZE = (200, 200)  # 比較用に縮小するサイズ
+    PAGE_DIFF_ROI = (0.25, 0.25, 0.75, 0.75)  # 比較対象の相対矩形（ヘッダー・フッターを除外）
+    PAGE_DIFF_PIXEL_THRESHOLD = 15  # 画素を変化ありとみなす輝度差
+    PAGE_DIFF_SIMILARITY_THRESHOLD = 0.90  # この類似度を超えたら同一ページ
+    
+    # 本文領域検出設定（撮影・比較・保存・OCRを本文部分だけに限定）
+    PAGE_REGION_DETECTION = True
+    PAGE_REGION_PADDING = 0.02  # 検出領域の周囲に足す余白（画面サイズに対する割合）
+    PAGE_REGION_MIN_AREA = 0.1  # 本文領域とみなす最小面積（画面に対する割合）
+    PAGE_REGION_DIFF_ROI = (0.05, 0.05, 0.95, 0.95)  # 本文領域内でページ比較に使う相対矩形
+    
+    # 重複ページ検出設定
+    PAGE_HASH_SIZE = 16  # dHashの一辺のサイズ（256ビット）
+    PAGE_HASH_MAX_DISTANCE = 4  # このハミング距離以下を重複ページとみなす
+    PAGE_HASH_WINDOW = 3  # 重複判定の対象とする直近ページ数
+    MAX_CONSECUTIVE_DUPLICATES = 3  # 連続でこの回数重複したら書籍終了とみなす
     
     # 書籍設定
     BOOK_TITLE = os.getenv("BOOK_TITLE", "指定の書籍タイトル")  # 環境変数またはデフォルト値
@@ -15,17 +50,52 @@ class Config:
     # Google Drive設定
     GOOGLE_DRIVE_FOLDER_ID = os.getenv("GOOGLE_DRIVE_FOLDER_ID", "")
     GOOGLE_CREDENTIALS_FILE = "credentials.json"
+    DRIVE_UPLOAD_WORKERS = 8  # 並行アップロード数
+    DRIVE_FOLDER_CACHE_FILE = os.path.join("output", ".drive_folder_cache.json")  # 書籍タイトル → フォルダID
+    DRIVE_SYNC_MODE = True  # 書籍フォルダの既存ファイルと比較し、新規・変更分だけをアップロード
+    DRIVE_MULTIPART_THRESHOLD_MB = 5  # これ以下のファイルはマルチパート（1リクエスト）でアップロード
+    DRIVE_MAX_RETRIES = 5  # 429/5xx・通信エラー時の再試行回数
+    DRIVE_RETRY_BASE_DELAY = 1.0  # 指数バックオフの初回待機時間（秒）
+    DRIVE_RETRY_MAX_DELAY = 32.0  # 指数バックオフの最大待機時間（秒）
+    DRIVE_TOKEN_REFRESH_MARGIN = 300  # アクセストークンの期限がこの秒数を切ったら裏で更新
     
 
     
     # OCR設定
     OCR_LANGUAGE = "jpn"  # 日本語
     TESSERACT_PATH = "/opt/homebrew/bin/tesseract"  # macOSの場合
+    OCR_WORKERS = 0  # 並列OCRのプロセス数（0: CPUコア数、1: 逐次処理）
+    OCR_BATCH_SIZE = 8  # 1回のtesseract実行でOCRする最大ページ数（言語モデルの読み込みを減らす）
+    OCR_PREPROCESS_ENABLED = True  # OCR前に画像を前処理（OCRワーカー内で実行）
+    OCR_PREPROCESS_BINARIZE = True  # 適応的二値化（背景色のムラ・アンチエイリアスを除く）
+    OCR_PREPROCESS_BLOCK_SIZE = 31  # 適応的二値化の近傍サイズ（奇数）
+    OCR_PREPROCESS_C = 15  # 適応的二値化で近傍平均から差し引く値
+    OCR_PREPROCESS_CROP_MARGINS = True  # 文字のない余白を切り落とす
+    OCR_PREPROCESS_INVERT = "auto"  # ダークモードの反転（"auto": 背景の明るさで判定, True/False: 常に反転/しない）
+    OCR_SOURCE_DPI = 144  # 画面キャプチャの想定DPI（Retina）
+    OCR_TARGET_DPI = 0  # OCRに渡す画像のDPI（0または同じ値なら拡大縮小しない。拡大すると前処理・OCRとも遅くなる）
+    OCR_CACHE_ENABLED = True  # 画像内容をキーにOCR結果を再利用
+    OCR_CACHE_PATH = os.path.join("output", ".ocr_cache.sqlite3")  # 全書籍で共有
+    OCR_CACHE_MAX_MB = 200  # キャッシュの上限サイズ（超えると参照の古いものから削除）
+    
+    # パイプライン設定
+    PIPELINE_MODE = True  # 撮影と並行してOCR・アップロードを実行
+    PIPELINE_QUEUE_SIZE = 8  # 撮影→OCR/アップロード間のキュー上限（超えると撮影側が待機）
     
     # 出力設定
     OUTPUT_FOLDER = "output"
     SCREENSHOTS_FOLDER = "screenshots"
     TEXT_OUTPUT_FILE = "extracted_text.txt"
+    SEARCH_INDEX_ENABLED = True  # 完了した書籍を全文検索インデックスに登録
+    SEARCH_INDEX_PATH = os.path.join("output", ".search_index.sqlite3")  # 全書籍で共有
+    BATCH_SUMMARY_FILE = os.path.join("output", "batch_summary.json")  # 連続実行の書籍ごとの結果
+    SCREENSHOT_FORMAT = "png"  # ページ画像の保存形式（png: 高速圧縮PNG, webp: ロスレスWebP, gray: グレースケールPNG, tiff_1bit: 2値化TIFF）
+    IMAGE_WRITER_QUEUE_SIZE = 16  # 保存待ち画像の上限（超えると撮影側が待機）
+    PAGE_ARCHIVE_ENABLED = False  # ページ画像を1つのアーカイブにまとめてアップロード（個別アップロードしない）
+    PAGE_ARCHIVE_FORMAT = "cbz"  # アーカイブの拡張子（cbz または zip）
+    SEARCHABLE_PDF_ENABLED = False  # OCRと同じtesseract実行で検索可能PDF（画像＋透明テキスト）を作成
+    PDF_PAGES_FOLDER = "pdf_pages"  # ページごとのPDFの保存先（書籍フォルダ内）
+    SEARCHABLE_PDF_FILE = "searchable.pdf"  # 結合した検索可能PDF（結合は書籍の最後に1回、メモリはページPDFの合計サイズ程度）
     
 
     
@@ -72,4 +142,18 @@ class Config:
         """テキスト出力ファイルの完全パスを取得"""
         return os.path.join(self.OUTPUT_FOLDER, self.TEXT_OUTPUT_FILE)
     
+    def get_pdf_pages_folder_path(self):
+        """ページごとの検索可能PDFフォルダの完全パスを取得（無効な場合は None）"""
+        if not self.SEARCHABLE_PDF_ENABLED:
+            return None
+        return os.path.join(self.OUTPUT_FOLDER, self.PDF_PAGES_FOLDER)
+    
+    def get_searchable_pdf_path(self):
+        """結合した検索可能PDFの完全パスを取得"""
+        return os.path.join(self.OUTPUT_FOLDER, self.SEARCHABLE_PDF_FILE)
+    
+    def get_archive_path(self):
+        """ページ画像アーカイブの完全パスを取得"""
+        return os.path.join(self.OUTPUT_FOLDER, f"pages.{self.PAGE_ARCHIVE_FORMAT}")
+    
  
\ No newline at end of file
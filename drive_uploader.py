@@ -0,0 +1,58 @@
+import time
+import logging
+from dataclasses import dataclass, field
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class UploadReport:
+    """一括アップロードの結果"""
+    uploaded: dict = field(default_factory=dict)  # ファイルパス -> ファイルID
+    failed: dict = field(default_factory=dict)  # ファイルパス -> エラーメッセージ
+    elapsed: float = 0.0
+
+
+class ConcurrentDriveUploader:
+    """スレッドプールで複数ファイルを並行アップロードする
+
+    各スレッドは GoogleDriveManager のスレッド専用クライアントを使い、
+    一時的なエラーの再試行も GoogleDriveManager 側で行う。
+    最後まで失敗したファイルはレポートにまとめて返す。
+    """
+
+    def __init__(self, drive_manager, workers=8):
+        self.drive_manager = drive_manager
+        self.workers = max(1, workers)
+
+    def upload_all(self, file_paths, use_book_folder=True, on_uploaded=None):
+        """全ファイルをアップロードして UploadReport を返す"""
+        report = UploadReport()
+        if not file_paths:
+            return report
+
+        start = time.monotonic()
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="drive-upload") as executor:
+            futures = {
+                executor.submit(self.drive_manager.upload_file_or_raise, path,
+                                use_book_folder=use_book_folder): path
+                for path in file_paths
+            }
+            for future in as_completed(futures):
+                path = futures[future]
+                try:
+                    file_id = future.result()
+                except Exception as e:
+                    report.failed[path] = str(e)
+                    continue
+                report.uploaded[path] = file_id
+                if on_uploaded:
+                    on_uploaded(path, file_id)
+        report.elapsed = time.monotonic() - start
+
+        logger.info(f"アップロード: {len(report.uploaded)}/{len(file_paths)}ファイル成功 "
+                    f"({report.elapsed:.1f}秒, {self.workers}並列)")
+        for path, error in report.failed.items():
+            logger.error(f"アップロード失敗: {path}: {error}")
+        return report
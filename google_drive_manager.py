@@ -1,55 +1,266 @@
 import os
+import json
+import time
+import hashlib
+import random
+import socket
 import logging
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from google.auth.transport.requests import Request
-from googleapiclient.discovery import build
-from googleapiclient.http import MediaFileUpload
+import datetime
+import threading
 from config import Config
+from drive_uploader import ConcurrentDriveUploader
+from lazy_import import lazy_import
+
+# Google APIクライアントは読み込みが重いため、Driveを実際に使うまで読み込まない
+httplib2 = lazy_import('httplib2')
+oauth2_credentials = lazy_import('google.oauth2.credentials')
+oauthlib_flow = lazy_import('google_auth_oauthlib.flow')
+auth_requests = lazy_import('google.auth.transport.requests')
+google_auth_httplib2 = lazy_import('google_auth_httplib2')
+discovery = lazy_import('googleapiclient.discovery')
+discovery_cache = lazy_import('googleapiclient.discovery_cache')
+api_errors = lazy_import('googleapiclient.errors')
+api_http = lazy_import('googleapiclient.http')
 
 logger = logging.getLogger(__name__)
 
-class GoogleDriveManager:
-    def __init__(self):
-        self.config = Config()
-        self.service = self._authenticate()
-        self.book_folder_id = None
-        
-    def _authenticate(self):
-        """Google Drive APIの認証"""
-        SCOPES = ['https://www.googleapis.com/auth/drive.file']
-        creds = None
+SCOPES = ['https://www.googleapis.com/auth/drive.file']
+
+# 再試行するHTTPステータス（レート制限・サーバーエラー）
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+# プロセス全体で共有する認証情報・ディスカバリー文書・スレッドごとのクライアント
+_credentials = None
+_credentials_lock = threading.Lock()
+_discovery_document = None
+_thread_clients = threading.local()
+_token_refresher = None
+_warm_up_thread = None
+
+
+def _load_discovery_document():
+    """パッケージ同梱のDrive v3ディスカバリー文書を1度だけ読み込む（ネットワーク取得なし）"""
+    global _discovery_document
+    if _discovery_document is None:
+        _discovery_document = discovery_cache.get_static_doc('drive', 'v3')
+    return _discovery_document
+
+
+def build_drive_service(credentials=None, http=None):
+    """キャッシュしたディスカバリー文書からDriveクライアントを作成"""
+    document = _load_discovery_document()
+    if document is None:
+        return discovery.build('drive', 'v3', credentials=credentials, http=http, cache_discovery=False)
+    return discovery.build_from_document(document, credentials=credentials, http=http)
+
+
+def _save_token(creds):
+    with open('token.json', 'w') as token:
+        token.write(creds.to_json())
+
+
+def get_credentials(config=None, interactive=True):
+    """プロセス共通の認証情報を取得（初回のみ読み込み・更新・認証フローを実行）
+
+    interactive=False の場合、ブラウザでの認証が必要なら例外を送出する（バックグラウンド用）。
+    """
+    global _credentials
+    config = config or Config()
+    with _credentials_lock:
+        creds = _credentials
+        if creds and creds.valid:
+            return creds
         
         # トークンファイルが存在する場合は読み込み
-        if os.path.exists('token.json'):
-            creds = Credentials.from_authorized_user_file('token.json', SCOPES)
+        if creds is None and os.path.exists('token.json'):
+            creds = oauth2_credentials.Credentials.from_authorized_user_file('token.json', SCOPES)
         
-        # 有効な認証情報がない場合は認証フローを実行
+        # 有効な認証情報がない場合は更新または認証フローを実行
         if not creds or not creds.valid:
             if creds and creds.expired and creds.refresh_token:
-                creds.refresh(Request())
-            else:
-                flow = InstalledAppFlow.from_client_secrets_file(
-                    self.config.GOOGLE_CREDENTIALS_FILE, SCOPES)
+                creds.refresh(auth_requests.Request())
+            elif interactive:
+                flow = oauthlib_flow.InstalledAppFlow.from_client_secrets_file(
+                    config.GOOGLE_CREDENTIALS_FILE, SCOPES)
                 creds = flow.run_local_server(port=0)
+            else:
+                raise RuntimeError("有効なトークンがありません。ブラウザでの認証が必要です")
             
             # 認証情報を保存
-            with open('token.json', 'w') as token:
-                token.write(creds.to_json())
+            _save_token(creds)
+        
+        _credentials = creds
+    _start_token_refresher(config)
+    return creds
+
+
+def _start_token_refresher(config):
+    """トークンの期限切れ前に裏で更新するスレッドを起動（プロセスで1つ）"""
+    global _token_refresher
+    if _token_refresher is None or not _token_refresher.is_alive():
+        _token_refresher = _TokenRefresher(config.DRIVE_TOKEN_REFRESH_MARGIN)
+        _token_refresher.start()
+
+
+class _TokenRefresher(threading.Thread):
+    """期限が近づいたアクセストークンを事前に更新する"""
+
+    def __init__(self, margin, check_interval=60):
+        super().__init__(name="drive-token-refresher", daemon=True)
+        self.margin = datetime.timedelta(seconds=margin)
+        self.check_interval = check_interval
+
+    def run(self):
+        while True:
+            time.sleep(self.check_interval)
+            with _credentials_lock:
+                creds = _credentials
+                if not (creds and creds.expiry and creds.refresh_token):
+                    continue
+                now = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+                if creds.expiry - now > self.margin:
+                    continue
+                try:
+                    creds.refresh(auth_requests.Request())
+                    _save_token(creds)
+                    logger.info("Google Driveのアクセストークンを更新しました")
+                except Exception as e:
+                    logger.warning(f"アクセストークンの事前更新に失敗: {e}")
+
+
+def get_thread_service(config=None):
+    """現在のスレッド専用のDriveクライアントを取得（接続はスレッド内で再利用）
+
+    httplib2は複数スレッドで共有できないため、スレッドごとに作成してプロセス内で使い回す。
+    """
+    service = getattr(_thread_clients, 'service', None)
+    if service is None:
+        http = google_auth_httplib2.AuthorizedHttp(get_credentials(config), http=httplib2.Http(timeout=60))
+        service = build_drive_service(http=http)
+        _thread_clients.service = service
+    return service
+
+
+def warm_up(config=None):
+    """認証情報とディスカバリー文書の読み込みをバックグラウンドで済ませておく
+
+    準備済み（有効な認証情報とディスカバリー文書がある）または準備中の場合は何もしない
+    （連続実行で書籍ごとにスレッドを起動しないように）。
+    """
+    global _warm_up_thread
+    if _warm_up_thread is not None and _warm_up_thread.is_alive():
+        return _warm_up_thread
+    creds = _credentials
+    if creds and creds.valid and _discovery_document is not None:
+        return None
+    
+    def run():
+        try:
+            _load_discovery_document()
+            get_credentials(config, interactive=False)
+            logger.info("Google Drive連携の準備が完了しました")
+        except Exception as e:
+            logger.warning(f"Google Drive連携の事前準備に失敗（使用時に再試行します）: {e}")
+    _warm_up_thread = threading.Thread(target=run, name="drive-warm-up", daemon=True)
+    _warm_up_thread.start()
+    return _warm_up_thread
+
+
+class GoogleDriveManager:
+    def __init__(self):
+        self.config = Config()
+        self.book_folder_id = None
+        # 書籍フォルダ内の既存ファイル（差分同期用、ファイル名 -> メタデータ）
+        self.remote_files = None
+        self._remote_lock = threading.Lock()
+    
+    @property
+    def credentials(self):
+        """Google Drive APIの認証情報（初回アクセス時に認証）"""
+        return get_credentials(self.config)
+    
+    @property
+    def service(self):
+        """現在のスレッドのDriveクライアント（初回アクセス時に作成）"""
+        return get_thread_service(self.config)
+    
+    def _thread_service(self):
+        """現在のスレッド専用のAPIクライアントを取得"""
+        return get_thread_service(self.config)
+    
+    def preflight_check(self):
+        """認証・API接続・アップロード先フォルダを事前に確認し、[(項目, 成否, 詳細)] を返す"""
+        results = []
+        
+        has_token = os.path.exists('token.json')
+        has_secrets = os.path.exists(self.config.GOOGLE_CREDENTIALS_FILE)
+        results.append(("認証ファイル", has_token or has_secrets,
+                        "token.json" if has_token else
+                        self.config.GOOGLE_CREDENTIALS_FILE if has_secrets else
+                        f"{self.config.GOOGLE_CREDENTIALS_FILE} がありません"))
+        if not results[-1][1]:
+            return results
         
-        return build('drive', 'v3', credentials=creds)
+        try:
+            self.credentials
+            results.append(("認証", True, "有効なトークンを取得しました"))
+        except Exception as e:
+            results.append(("認証", False, str(e)))
+            return results
+        
+        try:
+            about = self._execute_with_retry(
+                lambda: self._thread_service().about().get(fields='user(emailAddress)'),
+                "API接続確認")
+            results.append(("API接続", True, about.get('user', {}).get('emailAddress', '')))
+        except Exception as e:
+            results.append(("API接続", False, str(e)))
+            return results
+        
+        folder_id = self.config.GOOGLE_DRIVE_FOLDER_ID
+        if folder_id:
+            try:
+                folder = self._execute_with_retry(
+                    lambda: self._thread_service().files().get(fileId=folder_id, fields='id, name'),
+                    "アップロード先フォルダの確認")
+                results.append(("アップロード先フォルダ", True, folder.get('name', folder_id)))
+            except Exception as e:
+                results.append(("アップロード先フォルダ", False, str(e)))
+        return results
+    
+    def _execute_with_retry(self, make_request, description):
+        """リクエストを実行し、429/5xxや通信エラーは指数バックオフで再試行"""
+        max_retries = self.config.DRIVE_MAX_RETRIES
+        for attempt in range(max_retries + 1):
+            try:
+                return make_request().execute()
+            except api_errors.HttpError as e:
+                if e.resp.status not in RETRYABLE_STATUS or attempt == max_retries:
+                    raise
+                reason = f"HTTP {e.resp.status}"
+            except (socket.timeout, ConnectionError, httplib2.HttpLib2Error) as e:
+                if attempt == max_retries:
+                    raise
+                reason = type(e).__name__
+            
+            # 上限付き指数バックオフ（ジッターあり）
+            delay = min(self.config.DRIVE_RETRY_MAX_DELAY, self.config.DRIVE_RETRY_BASE_DELAY * (2 ** attempt))
+            delay = random.uniform(delay / 2, delay)
+            logger.warning(f"{description}: {reason} のため{delay:.1f}秒後に再試行します"
+                           f"（{attempt + 1}/{max_retries}）")
+            time.sleep(delay)
     
     def setup_book_folder(self, book_title):
-        """書籍タイトルに基づいたフォルダを作成"""
+        """書籍タイトルに基づいたフォルダを用意（既存があれば再利用し、なければ作成）"""
         try:
             # 書籍タイトルをファイル名に使用可能な形式に変換
             safe_title = self._sanitize_filename(book_title)
             
-            # フォルダを作成
-            self.book_folder_id = self.create_folder(safe_title)
+            self.book_folder_id = self.resolve_folder(safe_title)
             
             if self.book_folder_id:
-                logger.info(f"書籍フォルダを作成しました: {safe_title} (ID: {self.book_folder_id})")
+                if self.config.DRIVE_SYNC_MODE:
+                    self.load_remote_files()
                 return self.book_folder_id
             else:
                 logger.error("書籍フォルダの作成に失敗しました")
@@ -59,6 +270,91 @@ class GoogleDriveManager:
             logger.error(f"書籍フォルダの設定に失敗: {e}")
             return None
     
+    def resolve_folder(self, folder_name):
+        """フォルダIDを取得（ローカルキャッシュ → Drive上の検索 → 新規作成の順）"""
+        parent_id = self.config.GOOGLE_DRIVE_FOLDER_ID or 'root'
+        cache_key = f"{parent_id}/{folder_name}"
+        folder_cache = self._load_folder_cache()
+        
+        # 1. キャッシュ済みのIDがまだ有効か確認
+        folder_id = folder_cache.get(cache_key)
+        if folder_id:
+            if self._folder_exists(folder_id):
+                logger.info(f"書籍フォルダを再利用します: {folder_name} (ID: {folder_id})")
+                return folder_id
+            logger.info(f"キャッシュ済みの書籍フォルダが見つからないため破棄します: {folder_id}")
+            folder_cache.pop(cache_key, None)
+        
+        # 2. 親フォルダ内に同名のフォルダがあれば使う
+        folder_id = self.find_folder(folder_name, parent_id)
+        if folder_id:
+            logger.info(f"既存の書籍フォルダを使用します: {folder_name} (ID: {folder_id})")
+        else:
+            # 3. なければ作成
+            folder_id = self.create_folder(folder_name)
+            if folder_id:
+                logger.info(f"書籍フォルダを作成しました: {folder_name} (ID: {folder_id})")
+        
+        if folder_id:
+            folder_cache[cache_key] = folder_id
+            self._save_folder_cache(folder_cache)
+        return folder_id
+    
+    def find_folder(self, folder_name, parent_id='root'):
+        """親フォルダ内の同名フォルダを検索してIDを返す（なければ None）"""
+        escaped_name = folder_name.replace('\\', '\\\\').replace("'", "\\'")
+        response = self._execute_with_retry(
+            lambda: self._thread_service().files().list(
+                q=(f"mimeType = 'application/vnd.google-apps.folder' and name = '{escaped_name}' "
+                   f"and '{parent_id}' in parents and trashed = false"),
+                fields='files(id, name, createdTime)',
+                orderBy='createdTime',
+                pageSize=10,
+            ),
+            "書籍フォルダの検索",
+        )
+        folders = response.get('files', [])
+        if len(folders) > 1:
+            logger.warning(f"同名のフォルダが{len(folders)}件あります。最も古いものを使用します: {folder_name}")
+        return folders[0]['id'] if folders else None
+    
+    def _folder_exists(self, folder_id):
+        """フォルダがDrive上に存在し、ゴミ箱に入っていないか確認"""
+        try:
+            folder = self._execute_with_retry(
+                lambda: self._thread_service().files().get(fileId=folder_id, fields='id, trashed'),
+                "書籍フォルダの確認",
+            )
+            return not folder.get('trashed', False)
+        except api_errors.HttpError as e:
+            if e.resp.status == 404:
+                return False
+            raise
+    
+    def _load_folder_cache(self):
+        """書籍タイトル → フォルダIDのローカルキャッシュを読み込み"""
+        cache_path = self.config.DRIVE_FOLDER_CACHE_FILE
+        if not os.path.exists(cache_path):
+            return {}
+        try:
+            with open(cache_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"フォルダキャッシュの読み込みに失敗: {e}")
+            return {}
+    
+    def _save_folder_cache(self, folder_cache):
+        """フォルダIDのローカルキャッシュを保存"""
+        cache_path = self.config.DRIVE_FOLDER_CACHE_FILE
+        try:
+            cache_dir = os.path.dirname(cache_path)
+            if cache_dir:
+                os.makedirs(cache_dir, exist_ok=True)
+            with open(cache_path, 'w', encoding='utf-8') as f:
+                json.dump(folder_cache, f, ensure_ascii=False, indent=2)
+        except OSError as e:
+            logger.warning(f"フォルダキャッシュの保存に失敗: {e}")
+    
     def _sanitize_filename(self, filename):
         """ファイル名に使用できない文字を置換"""
         # ファイル名に使用できない文字を置換
@@ -82,46 +378,119 @@ class GoogleDriveManager:
     def upload_file(self, file_path, filename=None, use_book_folder=True):
         """ファイルをGoogle Driveにアップロード"""
         try:
-            if filename is None:
-                filename = os.path.basename(file_path)
-            
-            # アップロード先のフォルダIDを決定
-            if use_book_folder and self.book_folder_id:
-                parent_folder_id = self.book_folder_id
-            else:
-                parent_folder_id = self.config.GOOGLE_DRIVE_FOLDER_ID
-            
-            file_metadata = {
-                'name': filename,
-                'parents': [parent_folder_id] if parent_folder_id else []
-            }
-            
-            media = MediaFileUpload(file_path, resumable=True)
-            file = self.service.files().create(
-                body=file_metadata,
-                media_body=media,
-                fields='id'
-            ).execute()
-            
-            logger.info(f"ファイルアップロード完了: {filename} (ID: {file.get('id')})")
-            return file.get('id')
-            
+            return self.upload_file_or_raise(file_path, filename, use_book_folder)
         except Exception as e:
             logger.error(f"ファイルアップロードに失敗 {file_path}: {e}")
             return None
     
-    def upload_screenshots(self, screenshot_paths):
-        """スクリーンショットを一括アップロード"""
+    def load_remote_files(self):
+        """書籍フォルダ内の既存ファイル一覧を取得（ページングして全件）"""
+        if not self.book_folder_id:
+            return {}
+        remote_files = {}
+        page_token = None
+        while True:
+            response = self._execute_with_retry(
+                lambda: self._thread_service().files().list(
+                    q=f"'{self.book_folder_id}' in parents and trashed = false",
+                    fields='nextPageToken, files(id, name, size, md5Checksum)',
+                    pageSize=1000,
+                    pageToken=page_token,
+                ),
+                "書籍フォルダの一覧取得",
+            )
+            for item in response.get('files', []):
+                remote_files[item['name']] = item
+            page_token = response.get('nextPageToken')
+            if not page_token:
+                break
+        with self._remote_lock:
+            self.remote_files = remote_files
+        logger.info(f"書籍フォルダの既存ファイル: {len(remote_files)}件")
+        return remote_files
+    
+    @staticmethod
+    def _md5(file_path):
+        """ローカルファイルのMD5（Google Driveの md5Checksum と比較用）"""
+        digest = hashlib.md5()
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+    
+    def _find_remote(self, filename, file_path):
+        """同名の既存ファイルを探し、(ファイルID, 内容が同じか) を返す"""
+        with self._remote_lock:
+            remote = self.remote_files.get(filename) if self.remote_files is not None else None
+        if not remote:
+            return None, False
+        same = (int(remote.get('size', -1)) == os.path.getsize(file_path)
+                and remote.get('md5Checksum') == self._md5(file_path))
+        return remote['id'], same
+    
+    def upload_file_or_raise(self, file_path, filename=None, use_book_folder=True):
+        """ファイルをアップロードしてIDを返す（失敗時は例外を送出）
+        
+        複数スレッドから同時に呼び出せる。小さいファイルはマルチパート（1往復）、
+        大きいファイルはレジューマブルアップロードを使う。
+        書籍フォルダの一覧を取得済みの場合（差分同期）は、同じ内容のファイルは送らず
+        既存のIDを返し、内容が変わったファイルは新規作成せずに上書きする。
+        """
+        if filename is None:
+            filename = os.path.basename(file_path)
+        
+        # アップロード先のフォルダIDを決定
+        if use_book_folder and self.book_folder_id:
+            parent_folder_id = self.book_folder_id
+        else:
+            parent_folder_id = self.config.GOOGLE_DRIVE_FOLDER_ID
+        
+        existing_id = None
+        if use_book_folder and self.book_folder_id:
+            existing_id, same = self._find_remote(filename, file_path)
+            if same:
+                logger.info(f"変更がないためアップロードをスキップ: {filename}")
+                return existing_id
+        
+        resumable = os.path.getsize(file_path) > self.config.DRIVE_MULTIPART_THRESHOLD_MB * 1024 * 1024
+        
+        def make_request():
+            media = api_http.MediaFileUpload(file_path, resumable=resumable)
+            files = self._thread_service().files()
+            if existing_id:
+                return files.update(fileId=existing_id, media_body=media,
+                                    fields='id, name, size, md5Checksum')
+            return files.create(
+                body={
+                    'name': filename,
+                    'parents': [parent_folder_id] if parent_folder_id else []
+                },
+                media_body=media,
+                fields='id, name, size, md5Checksum'
+            )
+        
+        file = self._execute_with_retry(make_request, f"{filename} のアップロード")
+        if use_book_folder and self.book_folder_id:
+            with self._remote_lock:
+                if self.remote_files is not None:
+                    self.remote_files[filename] = file
+        
+        action = "更新" if existing_id else "アップロード"
+        logger.info(f"ファイル{action}完了: {filename} (ID: {file.get('id')})")
+        return file.get('id')
+    
+    def upload_screenshots(self, screenshot_paths, on_uploaded=None):
+        """スクリーンショットを一括アップロード（複数スレッドで並行実行）
+        
+        on_uploaded: アップロード成功ごとに (ファイルパス, ファイルID) で呼ばれるコールバック
+        """
         logger.info("スクリーンショットをGoogle Driveにアップロードしています...")
         
-        uploaded_files = []
-        for screenshot_path in screenshot_paths:
-            file_id = self.upload_file(screenshot_path, use_book_folder=True)
-            if file_id:
-                uploaded_files.append(file_id)
+        uploader = ConcurrentDriveUploader(self, workers=self.config.DRIVE_UPLOAD_WORKERS)
+        report = uploader.upload_all(screenshot_paths, on_uploaded=on_uploaded)
         
-        logger.info(f"スクリーンショットアップロード完了: {len(uploaded_files)}ファイル")
-        return uploaded_files
+        logger.info(f"スクリーンショットアップロード完了: {len(report.uploaded)}ファイル")
+        return [report.uploaded[path] for path in screenshot_paths if path in report.uploaded]
     
     def create_folder(self, folder_name):
         """フォルダを作成"""
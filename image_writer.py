@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+ページ画像の保存（エンコード）
+
+使い方（保存形式ごとのサイズ・エンコード時間の比較）:
+    python3 image_writer.py ページ画像 [ページ画像 ...]
+"""
+
+import io
+import os
+import sys
+import time
+import queue
+import logging
+import threading
+from dataclasses import dataclass
+
+from lazy_import import lazy_import
+
+Image = lazy_import('PIL.Image')
+np = lazy_import('numpy')
+cv2 = lazy_import('cv2')
+
+logger = logging.getLogger(__name__)
+
+# 保存形式: 形式名 -> (拡張子, 変換後のモード, save() に渡すオプション)
+# モードが None の場合は撮影した画像のまま保存する
+IMAGE_FORMATS = {
+    'png': ('.png', None, {'compress_level': 1}),           # 高速圧縮のPNG
+    'webp': ('.webp', None, {'lossless': True, 'method': 0}),  # ロスレスWebP（最速設定）
+    'gray': ('.png', 'L', {'compress_level': 1}),           # グレースケールPNG
+    'tiff_1bit': ('.tif', '1', {'compression': 'group4'}),  # 2値化したTIFF（CCITT G4）
+}
+
+_STOP = object()
+
+
+def get_extension(format_name):
+    """保存形式に対応する拡張子"""
+    return _get_format(format_name)[0]
+
+
+def _get_format(format_name):
+    if format_name not in IMAGE_FORMATS:
+        raise ValueError(f"未対応の保存形式です: {format_name}（{', '.join(IMAGE_FORMATS)}）")
+    return IMAGE_FORMATS[format_name]
+
+
+def to_pil_image(image):
+    """PIL画像はそのまま返し、NumPy配列はPIL画像に変換
+
+    配列の色の並びは page_diff / page_hash と同じく、4チャンネルは BGRA（mss）、
+    3チャンネルは RGB（PIL画像を np.asarray したもの）、2次元はグレースケールとみなす。
+    """
+    if isinstance(image, Image.Image):
+        return image
+    array = np.ascontiguousarray(image)
+    if array.ndim == 2:
+        return Image.fromarray(array, 'L')
+    height, width, channels = array.shape
+    raw_mode = {4: 'BGRX', 3: 'RGB'}[channels]
+    return Image.frombuffer('RGB', (width, height), array, 'raw', raw_mode, 0, 1)
+
+
+def to_gray_array(image):
+    """PIL画像またはNumPy配列をグレースケールのNumPy配列に変換（色の並びは to_pil_image と同じ）"""
+    if isinstance(image, Image.Image):
+        if image.mode != 'L':
+            image = image.convert('L')
+        return np.asarray(image)
+    array = np.asarray(image)
+    if array.ndim == 3:
+        code = cv2.COLOR_BGRA2GRAY if array.shape[2] == 4 else cv2.COLOR_RGB2GRAY
+        array = cv2.cvtColor(array, code)
+    return array
+
+
+def image_size(image):
+    """PIL画像またはNumPy配列の (幅, 高さ)"""
+    if isinstance(image, Image.Image):
+        return image.size
+    array = np.asarray(image)
+    return array.shape[1], array.shape[0]
+
+
+def encode_image(image, format_name, target):
+    """画像を指定の保存形式で target（パスまたはファイルオブジェクト）に書き込む"""
+    _, mode, options = _get_format(format_name)
+    # NumPy配列で取得したフレームは保存スレッド側で変換する（撮影ループを止めない）
+    image = to_pil_image(image)
+    if mode == '1':
+        # ディザリングせずに閾値で2値化（文字の輪郭を保つ）
+        image = image.convert('L').point(lambda value: 255 if value >= 128 else 0, mode='1')
+    elif mode and image.mode != mode:
+        image = image.convert(mode)
+    elif image.mode == 'RGBA':
+        image = image.convert('RGB')
+    image.save(target, format=_pil_format(format_name), **options)
+
+
+def _pil_format(format_name):
+    extension = get_extension(format_name)
+    return {'.png': 'PNG', '.webp': 'WEBP', '.tif': 'TIFF'}[extension]
+
+
+@dataclass
+class ImageFormatStats:
+    """保存形式ごとの集計（枚数・合計サイズ・エンコード時間）"""
+    format_name: str
+    count: int = 0
+    total_bytes: int = 0
+    total_seconds: float = 0.0
+
+    def add(self, size, seconds):
+        self.count += 1
+        self.total_bytes += size
+        self.total_seconds += seconds
+
+    @property
+    def average_kb(self):
+        return self.total_bytes / self.count / 1024 if self.count else 0.0
+
+    @property
+    def average_ms(self):
+        return self.total_seconds / self.count * 1000 if self.count else 0.0
+
+    def summary(self):
+        return (f"保存形式 {self.format_name}: {self.count}枚, "
+                f"平均 {self.average_kb:.0f}KB, 平均エンコード {self.average_ms:.0f}ms, "
+                f"合計 {self.total_bytes / 1024 / 1024:.1f}MB")
+
+
+def benchmark_formats(image, formats=None):
+    """1枚の画像を各形式でメモリ上にエンコードし、形式ごとの集計を返す（形式選びの目安）"""
+    results = {}
+    for format_name in formats or IMAGE_FORMATS:
+        buffer = io.BytesIO()
+        start = time.perf_counter()
+        encode_image(image, format_name, buffer)
+        stats = ImageFormatStats(format_name)
+        stats.add(buffer.tell(), time.perf_counter() - start)
+        results[format_name] = stats
+    return results
+
+
+class BackgroundImageWriter:
+    """撮影した画像をバックグラウンドスレッドでエンコードして保存する
+
+    撮影ループは submit() で画像を渡すだけで、ディスクへの書き込みを待たない。
+    保存が終わったページから順に on_saved コールバックを呼ぶので、
+    OCRやジャーナルへの記録はファイルが確実に存在してから行われる。
+    保存に失敗したページは on_failed コールバックで通知する。
+    キューが満杯の場合だけ submit() がブロックする（メモリ使用量の上限）。
+    """
+
+    def __init__(self, format_name='png', queue_size=16):
+        _get_format(format_name)
+        self.format_name = format_name
+        self.extension = get_extension(format_name)
+        self.stats = ImageFormatStats(format_name)
+        self.failed = []  # (パス, エラー)
+
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._thread = threading.Thread(target=self._write_loop, name="image-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, image, path, on_saved=None, on_failed=None):
+        """画像の保存を依頼（on_saved / on_failed は書き込みスレッドから path を渡して呼ばれる）"""
+        self._queue.put((image, path, on_saved, on_failed))
+
+    def close(self):
+        """残りの画像を保存し終えるまで待つ"""
+        self._queue.put(_STOP)
+        self._thread.join()
+        if self.stats.count:
+            logger.info(self.stats.summary())
+        for path, error in self.failed:
+            logger.error(f"画像の保存に失敗: {path}: {error}")
+
+    def _write_loop(self):
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+            image, path, on_saved, on_failed = item
+            try:
+                start = time.perf_counter()
+                encode_image(image, self.format_name, path)
+                self.stats.add(os.path.getsize(path), time.perf_counter() - start)
+            except Exception as e:
+                self.failed.append((path, str(e)))
+                if on_failed:
+                    try:
+                        on_failed(path)
+                    except Exception as callback_error:
+                        logger.error(f"保存失敗の通知に失敗 {path}: {callback_error}")
+                continue
+            if on_saved:
+                try:
+                    on_saved(path)
+                except Exception as e:
+                    logger.error(f"保存後の処理に失敗 {path}: {e}")
+
+
+def main():
+    image_paths = sys.argv[1:]
+    if not image_paths:
+        print(__doc__)
+        return
+
+    # 撮影した画像と同じものを各形式でエンコードし、SCREENSHOT_FORMAT を選ぶ目安にする
+    totals = {format_name: ImageFormatStats(format_name) for format_name in IMAGE_FORMATS}
+    for image_path in image_paths:
+        with Image.open(image_path) as image:
+            image.load()
+            for format_name, stats in benchmark_formats(image).items():
+                totals[format_name].add(stats.total_bytes, stats.total_seconds)
+
+    print(f"🖼️  保存形式の比較（{len(image_paths)}枚）")
+    print("=" * 60)
+    for stats in totals.values():
+        print(f"{stats.format_name:<10} 平均 {stats.average_kb:8.0f} KB  平均エンコード {stats.average_ms:6.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,44 @@
 import os
 import time
-import pyautogui
-import cv2
-import numpy as np
-from PIL import Image
-import pytesseract
 from config import Config
+from lazy_import import lazy_import
+import google_drive_manager
 from google_drive_manager import GoogleDriveManager
-
+from page_diff import PageDiffEngine
+from page_hash import PageHashIndex
+from ocr_engine import ParallelOCR, ocr_batch_worker, page_pdf_path
+from ocr_preprocess import PreprocessOptions
+from page_pipeline import PagePipeline
+from window_focus import KindleWindowFocus
+from captured_frame import CapturedFrame
+from page_region import PageRegionDetector
+from ocr_cache import OCRCache
+from checkpoint_journal import CheckpointJournal
+from image_writer import BackgroundImageWriter, encode_image, get_extension, to_pil_image
+from screen_capture import create_capture_backend
+from page_archive import PageArchive
+from searchable_pdf import merge_page_pdfs
+from text_writer import StreamingTextWriter
+from search_index import LibrarySearchIndex
 import logging
 import subprocess
 
+
+def _configure_pyautogui(module):
+    """PyAutoGUI設定（初回使用時に適用）"""
+    module.FAILSAFE = True
+    module.PAUSE = 0  # 待機は操作ごとに ACTION_DELAYS で指定
+
+
+def _configure_pytesseract(module):
+    """OCR設定（初回使用時に適用）"""
+    module.pytesseract.tesseract_cmd = Config.TESSERACT_PATH
+
+
+# 読み込みの重いライブラリは初回使用時に読み込む（起動直後の設定確認を速くするため）
+pyautogui = lazy_import('pyautogui', on_import=_configure_pyautogui)
+pytesseract = lazy_import('pytesseract', on_import=_configure_pytesseract)
+
 # ログ設定
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -21,58 +49,155 @@ class KindleAutomation:
         self.screenshot_count = 0
         self.setup_directories()
         
-        # OCR設定
-        pytesseract.pytesseract.tesseract_cmd = self.config.TESSERACT_PATH
+        # キー入力（pyautogui と同じ press/hotkey を持つもの。シミュレータに差し替え可能）
+        self.screen = pyautogui
+        
+        # 画面取得（初回使用時に作成。シミュレータなどに差し替え可能）
+        self._capture = None
+        # 画面取得の範囲に反映済みのウィンドウ世代
+        self._capture_generation = 0
+        
+        # Kindleウィンドウのフォーカス管理
+        self.focus = KindleWindowFocus(
+            app_name=self.config.KINDLE_PROCESS_NAME,
+            window_bounds=self.config.KINDLE_WINDOW_BOUNDS,
+            check_interval=self.config.FOCUS_CHECK_INTERVAL,
+        )
         
-        # PyAutoGUI設定
-        pyautogui.FAILSAFE = True
-        pyautogui.PAUSE = 0.5
+        # ページ比較エンジン（numpyを読み込むため初回使用時に作成）
+        self._page_diff = None
         
+        # 本文領域（capture_all_pages の開始時に有効化）
+        self.page_region = None
+        # 本文領域に反映済みのウィンドウ世代（ページめくりの前にだけ更新し、1回のめくりの途中では変えない）
+        self._region_generation = 0
+        
+        # OCR結果キャッシュ（初回使用時に開く）
+        self._ocr_cache = None
+        
+        # チェックポイントジャーナル（run_full_automation で書籍ごとに開く）
+        self.journal = None
+        
+        # バックグラウンド画像保存（capture_all_pages の実行中のみ有効）
+        self.image_writer = None
+        
+        # このプロセスでKindleアプリを起動済みか（連続実行では2冊目以降の起動待ちを省く）
+        self.kindle_launched = False
+        
+    @property
+    def capture(self):
+        """画面取得バックエンド（mss はKindleウィンドウの範囲だけをメモリ上に直接取得する）"""
+        if self._capture is None:
+            self._capture_generation = self.focus.window_generation
+            self._capture = create_capture_backend(
+                self.config.CAPTURE_BACKEND,
+                region=self._capture_region(),
+                screen=self.screen,
+            )
+        return self._capture
+    
+    @capture.setter
+    def capture(self, backend):
+        self._capture = backend
+    
+    def _capture_region(self):
+        """画面取得の範囲（macOSがずらした後の実際のウィンドウ位置・サイズを優先する）"""
+        if not self.config.CAPTURE_WINDOW_ONLY:
+            return None
+        return self.focus.actual_bounds or self.config.KINDLE_WINDOW_BOUNDS
+    
+    def _refresh_capture_region(self):
+        """ウィンドウの位置・サイズが変わっていれば画面取得の範囲を合わせる"""
+        if self._capture_generation == self.focus.window_generation:
+            return
+        self._capture_generation = self.focus.window_generation
+        self.capture.set_region(self._capture_region())
+    
+    @property
+    def page_diff(self):
+        """ページ比較エンジン"""
+        if self._page_diff is None:
+            self._page_diff = PageDiffEngine(
+                size=self.config.PAGE_DIFF_SIZE,
+                roi=self.config.PAGE_DIFF_ROI,
+                pixel_threshold=self.config.PAGE_DIFF_PIXEL_THRESHOLD,
+                similarity_threshold=self.config.PAGE_DIFF_SIMILARITY_THRESHOLD,
+            )
+        return self._page_diff
+    
     def setup_directories(self):
         """必要なディレクトリを作成"""
         os.makedirs(self.config.OUTPUT_FOLDER, exist_ok=True)
         os.makedirs(self.config.get_screenshots_folder_path(), exist_ok=True)
+    
+    def set_book(self, book_title):
+        """処理する書籍を切り替え（Kindleの状態・OCRキャッシュ・Drive認証はそのまま使い続ける）"""
+        self.config.set_book_title(book_title)
+        self.setup_directories()
+        self.journal = None
+        self.page_region = None
         
     def activate_kindle(self):
-        """Kindleアプリをアクティブ化"""
-        try:
-            # より確実なアクティブ化スクリプト
-            applescript = '''
-            tell application "Amazon Kindle"
-                activate
-                delay 0.5
-                tell application "System Events"
-                    tell process "Amazon Kindle"
-                        set frontmost to true
-                    end tell
-                end tell
-            end tell
-            '''
-            subprocess.run(['osascript', '-e', applescript])
-            time.sleep(1.5)  # アクティブ化待ちを長めに
-            
-            # ウィンドウを最大化
-            maximize_script = '''
-            tell application "System Events"
-                tell process "Amazon Kindle"
-                    set position of window 1 to {0, 0}
-                    set size of window 1 to {1920, 1080}
-                end tell
-            end tell
-            '''
-            subprocess.run(['osascript', '-e', maximize_script])
-            time.sleep(0.5)
-            
-            return True
-        except Exception as e:
-            logger.error(f"Kindleアプリのアクティブ化に失敗: {e}")
-            return False
+        """Kindleアプリをアクティブ化（ウィンドウ位置・サイズも設定）"""
+        return self.focus.activate()
+    
+    def ensure_kindle_focus(self):
+        """Kindleが最前面でない場合だけアクティブ化"""
+        return self.focus.ensure_focus()
+    
+    def enable_page_region(self):
+        """本文領域の検出を有効化（以降の画面取得は本文部分だけを返す）"""
+        if not self.config.PAGE_REGION_DETECTION:
+            return
+        self.page_region = PageRegionDetector(
+            padding=self.config.PAGE_REGION_PADDING,
+            min_area_ratio=self.config.PAGE_REGION_MIN_AREA,
+        )
+        self.page_diff.set_roi(self.config.PAGE_REGION_DIFF_ROI)
+    
+    def _crop_to_page(self, screenshot):
+        """本文領域が有効であれば画面全体の画像から本文部分を切り出す"""
+        if self.page_region is None:
+            return screenshot
+        return self.page_region.apply(screenshot, self._region_generation)
+    
+    def _sync_page_region(self):
+        """ウィンドウの位置・サイズの変化と撮影済みページで見つかった本文の広がりを
+        画面取得の範囲と本文領域に反映し、変わった場合は True を返す
+        
+        ページめくりの前にだけ呼ぶ（めくる前後のフレームを同じ範囲・領域で切り出すため）。
+        """
+        self._refresh_capture_region()
+        expanded = self.page_region is not None and self.page_region.expand()
+        if self._region_generation == self.focus.window_generation:
+            return expanded
+        self._region_generation = self.focus.window_generation
+        return True
+    
+    def _observe_page_region(self):
+        """直近に取得したページの本文の範囲を記録（次のページめくりの前に本文領域へ反映する）"""
+        if self.page_region is not None:
+            self.page_region.observe()
+    
+    def _grab_screen(self):
+        """画面を取得（本文領域が有効な場合は本文部分のみ）"""
+        return self._crop_to_page(self.capture.grab())
+    
+    def _press_key(self, key):
+        """キーを押して操作ごとの待機時間だけ待つ"""
+        self.screen.press(key)
+        time.sleep(self.config.ACTION_DELAYS.get('press', 0))
+    
+    def _hotkey(self, *keys):
+        """ショートカットキーを押して操作ごとの待機時間だけ待つ"""
+        self.screen.hotkey(*keys)
+        time.sleep(self.config.ACTION_DELAYS.get('hotkey', 0))
 
     def go_to_first_page(self):
         """最初のページになっていることを前提に、Kindleアプリをアクティブ化するだけ"""
         try:
             logger.info("Kindleアプリをアクティブ化し、最初のページが表示されていることを確認します...")
-            self.activate_kindle()
+            self.ensure_kindle_focus()
             
             # 最初のページが表示されていることを前提とする
             logger.info("最初のページが表示されていることを前提として処理を続行します")
@@ -89,32 +214,35 @@ class KindleAutomation:
             logger.info("矢印キーの方向を自動判定しています...")
             
             # 現在のページ（1ページ目）のスクリーンショットを撮影
-            current_screenshot = pyautogui.screenshot()
+            self._sync_page_region()
+            current_screenshot = self._grab_screen()
+            self._observe_page_region()
             
             # 右矢印キーを押してページが変わるかテスト
-            pyautogui.press('right')
-            time.sleep(self.config.PAGE_TURN_DELAY)
-            right_screenshot = pyautogui.screenshot()
+            self._press_key('right')
+            changed, right_screenshot = self.wait_for_page_turn(current_screenshot)
             
             # 右矢印でページが変わったかチェック
-            if not self._is_same_page(current_screenshot, right_screenshot):
+            if changed:
+                # 2ページ目の本文の範囲も撮影前に本文領域へ反映する（1ページ目だけで決めない）
+                self._observe_page_region()
                 logger.info("✅ 右矢印キー（→）でページが変わります")
                 # 左矢印で戻る
-                pyautogui.press('left')
-                time.sleep(self.config.PAGE_TURN_DELAY)
+                self._press_key('left')
+                self.wait_for_page_turn(right_screenshot)
                 return 'right'
             
             # 右矢印で変わらなかった場合、左矢印をテスト
-            pyautogui.press('left')
-            time.sleep(self.config.PAGE_TURN_DELAY)
-            left_screenshot = pyautogui.screenshot()
+            self._press_key('left')
+            changed, left_screenshot = self.wait_for_page_turn(current_screenshot)
             
             # 左矢印でページが変わったかチェック
-            if not self._is_same_page(current_screenshot, left_screenshot):
+            if changed:
+                self._observe_page_region()
                 logger.info("✅ 左矢印キー（←）でページが変わります")
                 # 右矢印で戻る
-                pyautogui.press('right')
-                time.sleep(self.config.PAGE_TURN_DELAY)
+                self._press_key('right')
+                self.wait_for_page_turn(left_screenshot)
                 return 'left'
             
             # どちらでも変わらない場合
@@ -129,10 +257,12 @@ class KindleAutomation:
     def open_kindle_and_book(self):
         """Kindleアプリを開いて書籍が既に開かれている状態を確認"""
         try:
-            logger.info("Kindleアプリを起動しています...")
-            # 1. Kindleアプリを直接起動
-            subprocess.run(['open', '-a', 'Amazon Kindle'])
-            time.sleep(5)  # 起動待ち
+            # 1. Kindleアプリを直接起動（このプロセスで起動済みなら省く）
+            if not self.kindle_launched:
+                logger.info("Kindleアプリを起動しています...")
+                subprocess.run(['open', '-a', 'Amazon Kindle'])
+                time.sleep(5)  # 起動待ち
+                self.kindle_launched = True
             # 2. アプリを最前面に
             self.activate_kindle()
             logger.info("Kindleアプリを前面に表示しました")
@@ -150,6 +280,19 @@ class KindleAutomation:
             logger.error(f"Kindleアプリの起動に失敗: {e}")
             return False
     
+    def open_book(self, asin):
+        """ASINを指定してKindleアプリで書籍を開く（kindle:// リンクを使用）"""
+        try:
+            logger.info(f"書籍を開いています（ASIN: {asin}）...")
+            subprocess.run(['open', f"kindle://book?action=open&asin={asin}"], check=True)
+            self.kindle_launched = True
+            time.sleep(self.config.BOOK_OPEN_WAIT)  # 書籍の読み込み待ち
+            self.activate_kindle()
+            return True
+        except Exception as e:
+            logger.error(f"書籍を開けませんでした（ASIN: {asin}）: {e}")
+            return False
+    
     def get_total_pages(self):
         """書籍の総ページ数を取得"""
         try:
@@ -157,11 +300,12 @@ class KindleAutomation:
             
             # Kindleアプリで総ページ数を確認する方法
             # 方法1: 目次や書籍情報から取得を試行
-            pyautogui.hotkey('cmd', 'i')  # 書籍情報を開く
+            self._hotkey('cmd', 'i')  # 書籍情報を開く
             time.sleep(2)
             
             # スクリーンショットを撮影してOCRでページ数を検出
-            info_screenshot = pyautogui.screenshot()
+            self._refresh_capture_region()
+            info_screenshot = to_pil_image(self.capture.grab())
             info_text = pytesseract.image_to_string(info_screenshot, lang=self.config.OCR_LANGUAGE)
             
             # ページ数のパターンを検索
@@ -182,7 +326,7 @@ class KindleAutomation:
                     break
             
             # 書籍情報を閉じる
-            pyautogui.press('escape')
+            self._press_key('escape')
             time.sleep(1)
             
             if total_pages:
@@ -199,35 +343,73 @@ class KindleAutomation:
     def take_screenshot(self):
         """スクリーンショットを撮影"""
         try:
-            # スクリーンショット前にKindleをアクティブ化
-            self.activate_kindle()
+            # スクリーンショット前にKindleが最前面であることを確認
+            self.ensure_kindle_focus()
             
-            screenshot = pyautogui.screenshot()
-            filename = f"page_{self.screenshot_count:04d}.png"
+            screenshot = self._grab_screen()
+            return self.save_screenshot(screenshot)
+        except Exception as e:
+            logger.error(f"スクリーンショット撮影に失敗: {e}")
+            return None
+    
+    def grab_frame(self):
+        """現在の画面を取得してフレームとして返す"""
+        return CapturedFrame(self._grab_screen())
+    
+    def save_screenshot(self, screenshot, on_saved=None, on_failed=None):
+        """撮影済みの画像をページ画像として保存
+        
+        バックグラウンド保存が有効な場合は保存を依頼してすぐにパスを返し、
+        書き込み完了後に on_saved(パス)、書き込みに失敗した場合は on_failed(パス) を呼ぶ。
+        無効な場合はその場で保存する（失敗時は None を返す）。
+        """
+        try:
+            extension = get_extension(self.config.SCREENSHOT_FORMAT)
+            filename = f"page_{self.screenshot_count:04d}{extension}"
             filepath = os.path.join(self.config.get_screenshots_folder_path(), filename)
-            screenshot.save(filepath)
+            if self.image_writer:
+                self.image_writer.submit(screenshot, filepath, on_saved=on_saved, on_failed=on_failed)
+            else:
+                encode_image(screenshot, self.config.SCREENSHOT_FORMAT, filepath)
+                if on_saved:
+                    on_saved(filepath)
             self.screenshot_count += 1
             logger.info(f"スクリーンショット保存: {filename}")
             return filepath
         except Exception as e:
-            logger.error(f"スクリーンショット撮影に失敗: {e}")
+            logger.error(f"スクリーンショット保存に失敗: {e}")
             return None
     
-    def turn_page(self, direction='right'):
-        """指定された方向の矢印キーで次のページに進む"""
+    def _create_page_hash_index(self):
+        """重複ページ検出用インデックスを作成"""
+        return PageHashIndex(
+            hash_size=self.config.PAGE_HASH_SIZE,
+            max_distance=self.config.PAGE_HASH_MAX_DISTANCE,
+            window=self.config.PAGE_HASH_WINDOW,
+        )
+    
+    def turn_page(self, direction='right', current_frame=None):
+        """指定された方向の矢印キーで次のページに進む
+        
+        成功した場合はページが変わったことを確認したフレーム（CapturedFrame）を返し、
+        失敗した場合は None を返す。返されたフレームはそのまま次ページの画像として使える。
+        current_frame: めくる前のページのフレーム（省略時は新たに取得）
+        """
         try:
-            self.activate_kindle()
-            current_screenshot = pyautogui.screenshot()
+            self.ensure_kindle_focus()
+            # ウィンドウや本文領域が変わっていれば、めくる前のページも新しい領域で取り直す
+            if self._sync_page_region() or current_frame is None:
+                current_frame = self.grab_frame()
+            current_screenshot = current_frame.image
 
             # 指定された方向の矢印キーで最大3回試行
             for attempt in range(3):
-                pyautogui.press(direction)
-                time.sleep(self.config.PAGE_TURN_DELAY)
-                new_screenshot = pyautogui.screenshot()
-                if not self._is_same_page(current_screenshot, new_screenshot):
+                self._press_key(direction)
+                changed, new_screenshot = self.wait_for_page_turn(current_screenshot)
+                if changed:
                     arrow_symbol = '→' if direction == 'right' else '←'
                     logger.info(f"ページを{direction}（{arrow_symbol}）でめくりました（試行{attempt + 1}回目）")
-                    return True
+                    return CapturedFrame(new_screenshot)
                 else:
                     arrow_symbol = '→' if direction == 'right' else '←'
                     logger.warning(f"{direction}（{arrow_symbol}）でページが変わっていません（試行{attempt + 1}回目）")
@@ -235,126 +417,403 @@ class KindleAutomation:
                         time.sleep(1)
 
             logger.warning(f"{direction}矢印キーでページが変わりませんでした。書籍の終了の可能性があります。")
-            return False
+            return None
         except Exception as e:
             logger.error(f"ページめくりに失敗: {e}")
-            return False
+            return None
     
-    def _is_same_page(self, img1, img2, threshold=0.90):
-        """2つの画像が同じページかどうかを簡易的に判定"""
+    def wait_for_page_turn(self, before_screenshot):
+        """キー入力後のページ描画完了を待ち、(ページが変わったか, 最新フレーム) を返す
+        
+        適応モードでは短い間隔でフレームを取得し、キー入力前から変化した後に
+        描画が安定した時点で完了とみなす。PAGE_TURN_TIMEOUT が上限。
+        """
+        if not self.config.ADAPTIVE_PAGE_TURN:
+            time.sleep(self.config.PAGE_TURN_DELAY)
+            screenshot = self._grab_screen()
+            return not self._is_same_page(before_screenshot, screenshot), screenshot
+        
+        start = time.monotonic()
+        deadline = start + self.config.PAGE_TURN_TIMEOUT
+        before = self.page_diff.prepare(before_screenshot)
+        previous = None
+        changed = False
+        stable_count = 0
+        screenshot = None
+        
+        while time.monotonic() < deadline:
+            time.sleep(self.config.PAGE_TURN_POLL_INTERVAL)
+            screenshot = self._grab_screen()
+            current = self.page_diff.prepare(screenshot)
+            
+            if not changed:
+                # まずキー入力前のページから変化したかを確認
+                changed = not self.page_diff.is_same_page(before, current)
+            elif self.page_diff.is_same_page(previous, current, self.config.PAGE_TURN_STABLE_THRESHOLD):
+                # 変化後は直前フレームとの差がなくなるまで待つ（描画・アニメーションの完了）
+                stable_count += 1
+                if stable_count >= self.config.PAGE_TURN_STABLE_FRAMES:
+                    logger.info(f"ページ描画完了: {time.monotonic() - start:.2f}秒")
+                    return True, screenshot
+            else:
+                stable_count = 0
+            previous = current
+        
+        if changed:
+            logger.warning(f"ページ描画が{self.config.PAGE_TURN_TIMEOUT}秒以内に安定しませんでした")
+            return True, screenshot
+        if screenshot is None:
+            screenshot = self._grab_screen()
+        return False, screenshot
+    
+    def _is_same_page(self, img1, img2, threshold=None):
+        """2つの画像が同じページかどうかを判定"""
         try:
-            # 画像を小さくして比較（処理速度向上）
-            img1_small = img1.resize((200, 200))
-            img2_small = img2.resize((200, 200))
-            
-            # グレースケールに変換
-            img1_gray = img1_small.convert('L')
-            img2_gray = img2_small.convert('L')
-            
-            # 中央部分のみを比較（ヘッダーやフッターの変化を除外）
-            center_size = 100
-            start_x = (200 - center_size) // 2
-            start_y = (200 - center_size) // 2
-            
-            diff = 0
-            total_pixels = center_size * center_size
-            
-            for x in range(start_x, start_x + center_size):
-                for y in range(start_y, start_y + center_size):
-                    if abs(img1_gray.getpixel((x, y)) - img2_gray.getpixel((x, y))) > 15:
-                        diff += 1
-            
-            similarity = 1 - (diff / total_pixels)
-            logger.info(f"ページ類似度: {similarity:.3f} (閾値: {threshold})")
-            return similarity > threshold
+            result = self.page_diff.compare(img1, img2, threshold)
+            logger.info(f"ページ類似度: {result.similarity:.3f} "
+                        f"(閾値: {threshold or self.page_diff.similarity_threshold}, 変化領域: {result.bbox})")
+            return result.is_same
             
         except Exception as e:
             logger.error(f"画像比較でエラー: {e}")
             return False
     
-    def capture_all_pages(self, max_pages=None, total_pages=None):
-        """全ページのスクリーンショットを撮影"""
+    def capture_all_pages(self, max_pages=None, total_pages=None, on_page_saved=None, on_page_failed=None):
+        """全ページのスクリーンショットを撮影
+        
+        on_page_saved: ページ保存直後に (ページ番号, ファイルパス) で呼ばれるコールバック
+        on_page_failed: バックグラウンドでの保存に失敗したページの (ページ番号, ファイルパス) で呼ばれるコールバック
+        """
         logger.info("全ページのスクリーンショット撮影を開始します")
         
-        # 最初に矢印キーの方向を判定
-        page_direction = self.determine_page_direction()
+        # 本文領域の検出を有効化（最初のフレームで検出し、以降はキャッシュ）
+        self.enable_page_region()
+        
+        journal = self.journal
+        resuming = journal is not None and bool(journal.pages)
+        
+        # 最初に矢印キーの方向を判定（再開時は前回の判定結果を使う）
+        if resuming and journal.direction:
+            page_direction = journal.direction
+        else:
+            page_direction = self.determine_page_direction()
+            if journal:
+                journal.record_direction(page_direction)
         logger.info(f"📖 ページめくり方向: {page_direction}矢印キーを使用します")
         
+        # 重複ページ検出用のハッシュインデックス
+        page_hashes = self._create_page_hash_index()
+        
         screenshots = []
         page_count = 0
-        consecutive_empty_pages = 0  # 連続空ページカウンター
-        
-        while max_pages is None or page_count < max_pages:
-            # スクリーンショット撮影
-            screenshot_path = self.take_screenshot()
-            if screenshot_path:
-                screenshots.append(screenshot_path)
-                page_count += 1
+        consecutive_duplicates = 0  # 連続重複ページカウンター
+        skipped_duplicates = 0
+        
+        if resuming:
+            # 撮影済みページを引き継ぎ、表示中のページが撮影済みなら重複として読み飛ばす
+            screenshots_folder = self.config.get_screenshots_folder_path()
+            screenshots = [os.path.join(screenshots_folder, name) for name in journal.captured_files()]
+            # 保存に失敗したページがあると番号が飛ぶため、枚数ではなく次のページ番号から続ける
+            page_count = journal.next_page_index()
+            self.screenshot_count = page_count
+            for name, value in journal.page_hashes():
+                page_hashes.add(name, value)
+            logger.info(f"前回の続きから撮影を再開します（撮影済み: {len(screenshots)}ページ, "
+                        f"次のページ番号: {page_count}）")
+        else:
+            self.screenshot_count = 0
+        
+        # 画像のエンコードと保存は別スレッドで行い、撮影ループを止めない
+        self.image_writer = BackgroundImageWriter(self.config.SCREENSHOT_FORMAT,
+                                                  queue_size=self.config.IMAGE_WRITER_QUEUE_SIZE)
+        try:
+            # 最初のページだけは直接取得し、以降はページめくりで確認したフレームを使う
+            try:
+                self.ensure_kindle_focus()
+                self._sync_page_region()
+                frame = self.grab_frame()
+            except Exception as e:
+                logger.error(f"スクリーンショット撮影に失敗: {e}")
+                frame = None
+            
+            while frame is not None and (max_pages is None or page_count < max_pages):
+                # このページの本文が今の領域からはみ出していれば（章の始まりの後など）、
+                # 領域を広げてこのページを取り直す（領域を変えるのはページめくりの合間のここだけ）
+                self._observe_page_region()
+                if self._sync_page_region():
+                    frame = self.grab_frame()
                 
-                # 進捗表示（パーセンテージ付き）
-                if total_pages:
-                    percentage = (page_count / total_pages) * 100
-                    logger.info(f"進捗: {page_count}/{total_pages}ページ ({percentage:.1f}%)")
-                else:
-                    if page_count % 10 == 0:
-                        logger.info(f"進捗: {page_count}ページ完了")
+                # 直近ページとの重複チェック（OCR・アップロードの無駄を省く）
+                page_hash = page_hashes.compute(frame.image)
+                duplicate_of = page_hashes.find_duplicate(page_hash)
+                if duplicate_of:
+                    consecutive_duplicates += 1
+                    skipped_duplicates += 1
+                    logger.warning(f"{duplicate_of} と重複するページのため保存をスキップします"
+                                   f"（連続{consecutive_duplicates}回目）")
+                    if consecutive_duplicates >= self.config.MAX_CONSECUTIVE_DUPLICATES:
+                        logger.info("重複ページが続いたため書籍の終了とみなします。処理を終了します。")
+                        break
+                    frame = self.turn_page(page_direction, current_frame=frame)
+                    if frame is None:
+                        logger.info("ページめくりに失敗しました。処理を終了します。")
+                    continue
                 
-                # 判定された方向の矢印キーで次のページに進む
-                if not self.turn_page(page_direction):
-                    logger.info("ページめくりに失敗しました。処理を終了します。")
-                    break
+                consecutive_duplicates = 0
                 
-                # 書籍終了の検出
-                if page_count > 10:  # 最初の10ページは除外
-                    # 総ページ数が分かっている場合はそれで制限
-                    if total_pages and page_count >= total_pages:
-                        logger.info(f"総ページ数({total_pages}ページ)に達しました。処理を終了します。")
-                        break
-                    # 安全のため500ページで制限
-                    elif page_count > 500:
-                        logger.info("500ページに達しました。処理を終了します。")
+                def on_saved(path, index=page_count, page_hash=page_hash):
+                    # ファイルが書き込まれてから記録し、後段（OCR・アップロード）に渡す
+                    if journal:
+                        journal.record_capture(index, os.path.basename(path), page_hash)
+                    if on_page_saved:
+                        on_page_saved(index, path)
+                
+                def on_failed(path, index=page_count):
+                    if on_page_failed:
+                        on_page_failed(index, path)
+                
+                screenshot_path = self.save_screenshot(frame.image, on_saved=on_saved, on_failed=on_failed)
+                if screenshot_path:
+                    frame.page_index = page_count
+                    screenshots.append(screenshot_path)
+                    page_hashes.add(os.path.basename(screenshot_path), page_hash)
+                    page_count += 1
+                    
+                    # 進捗表示（パーセンテージ付き）
+                    if total_pages:
+                        percentage = (page_count / total_pages) * 100
+                        logger.info(f"進捗: {page_count}/{total_pages}ページ ({percentage:.1f}%)")
+                    else:
+                        if page_count % 10 == 0:
+                            logger.info(f"進捗: {page_count}ページ完了")
+                    
+                    # 書籍終了の検出
+                    if page_count > 10:  # 最初の10ページは除外
+                        # 総ページ数が分かっている場合はそれで制限
+                        if total_pages and page_count >= total_pages:
+                            logger.info(f"総ページ数({total_pages}ページ)に達しました。処理を終了します。")
+                            break
+                        # 安全のため500ページで制限
+                        elif page_count > 500:
+                            logger.info("500ページに達しました。処理を終了します。")
+                            break
+                    
+                    if max_pages is not None and page_count >= max_pages:
                         break
                     
-                time.sleep(self.config.SCREENSHOT_DELAY)
-            else:
-                logger.error("スクリーンショット撮影に失敗しました")
-                break
+                    # 判定された方向の矢印キーで次のページに進む（確認したフレームが次ページの画像になる）
+                    frame = self.turn_page(page_direction, current_frame=frame)
+                    if frame is None:
+                        logger.info("ページめくりに失敗しました。処理を終了します。")
+                        break
+                else:
+                    logger.error("スクリーンショット撮影に失敗しました")
+                    break
+        finally:
+            # 保存待ちの画像を書き終えてから返す
+            writer, self.image_writer = self.image_writer, None
+            writer.close()
+        
+        # 保存に失敗したページは結果から除く
+        failed_paths = {path for path, _ in writer.failed}
+        if failed_paths:
+            screenshots = [path for path in screenshots if path not in failed_paths]
         
+        logger.info(f"Kindleのアクティブ化回数: {self.focus.activation_count}回")
+        logger.info(f"画面取得: {self.capture.grab_count}回（{self.capture.name}, 平均{self.capture.average_ms:.1f}ms）")
+        if skipped_duplicates:
+            logger.info(f"重複ページを{skipped_duplicates}枚スキップしました（OCR・アップロード対象外）")
         logger.info(f"スクリーンショット撮影完了: {len(screenshots)}ページ")
         return screenshots
     
+    def get_ocr_cache(self):
+        """OCR結果キャッシュを取得（無効な場合は None）"""
+        if not self.config.OCR_CACHE_ENABLED:
+            return None
+        if self._ocr_cache is None:
+            try:
+                self._ocr_cache = OCRCache(self.config.OCR_CACHE_PATH,
+                                           max_bytes=self.config.OCR_CACHE_MAX_MB * 1024 * 1024)
+            except Exception as e:
+                logger.warning(f"OCRキャッシュを開けませんでした（キャッシュなしで続行）: {e}")
+                self.config.OCR_CACHE_ENABLED = False
+                return None
+        return self._ocr_cache
+    
+    def get_preprocess_options(self):
+        """OCR前処理の設定（無効な場合は None）
+
+        検索可能PDFはOCRと同じtesseract実行で作るため、PDFの画像が元のページになるよう前処理しない。
+        """
+        if not self.config.OCR_PREPROCESS_ENABLED or self.config.SEARCHABLE_PDF_ENABLED:
+            return None
+        return PreprocessOptions(
+            binarize=self.config.OCR_PREPROCESS_BINARIZE,
+            block_size=self.config.OCR_PREPROCESS_BLOCK_SIZE,
+            c=self.config.OCR_PREPROCESS_C,
+            crop_margins=self.config.OCR_PREPROCESS_CROP_MARGINS,
+            invert=self.config.OCR_PREPROCESS_INVERT,
+            source_dpi=self.config.OCR_SOURCE_DPI,
+            target_dpi=self.config.OCR_TARGET_DPI,
+        )
+    
     def extract_text_from_image(self, image_path):
         """画像からテキストを抽出（OCR）"""
         try:
-            image = Image.open(image_path)
-            text = pytesseract.image_to_string(image, lang=self.config.OCR_LANGUAGE)
-            return text.strip()
+            preprocess = self.get_preprocess_options()
+            cache = self.get_ocr_cache()
+            cache_key = None
+            if cache:
+                cache_key = cache.make_key(image_path, self.config.OCR_LANGUAGE,
+                                           preprocess.cache_key() if preprocess else "")
+                text = cache.get(cache_key)
+                if text is not None:
+                    return text
+            
+            pytesseract.pytesseract.tesseract_cmd = self.config.TESSERACT_PATH
+            text, error = ocr_batch_worker([image_path], self.config.OCR_LANGUAGE, preprocess=preprocess)[0]
+            if error:
+                raise RuntimeError(error)
+            if cache_key:
+                cache.put(cache_key, text)
+            return text
         except Exception as e:
             logger.error(f"OCR処理に失敗 {image_path}: {e}")
             return ""
     
     def extract_text_from_all_images(self, image_paths):
-        """全画像からテキストを抽出"""
+        """全画像からテキストを抽出（CPUコア数に応じて並列実行）"""
         logger.info("全画像からテキストを抽出しています...")
         
-        all_text = []
-        for i, image_path in enumerate(image_paths):
-            logger.info(f"画像 {i+1}/{len(image_paths)} を処理中...")
-            text = self.extract_text_from_image(image_path)
-            if text:
-                all_text.append(text)
+        ocr = ParallelOCR(
+            lang=self.config.OCR_LANGUAGE,
+            tesseract_path=self.config.TESSERACT_PATH,
+            workers=self.config.OCR_WORKERS,
+            cache=self.get_ocr_cache(),
+            pdf_folder=self.config.get_pdf_pages_folder_path(),
+            batch_size=self.config.OCR_BATCH_SIZE,
+            preprocess=self.get_preprocess_options(),
+        )
+        
+        # 抽出したテキストはページ順に逐次書き出す（全ページ分を保持しない）
+        writer = self.open_text_writer()
         
-        # 全テキストを1つのファイルに保存
-        output_path = self.config.get_text_output_path()
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write('\n\n'.join(all_text))
+        def on_result(result):
+            logger.info(f"画像 {result.index + 1}/{len(image_paths)} を処理しました")
+            if not result.ok:
+                logger.error(f"OCR処理に失敗 {result.image_path}: {result.error}")
+            writer.add(result)
         
-        logger.info(f"テキスト抽出完了: {output_path}")
-        return '\n\n'.join(all_text)
+        try:
+            results = ocr.run(image_paths, progress_callback=on_result, keep_text=False)
+        finally:
+            writer.close()
+        
+        if self.journal:
+            for result in results:
+                filename = os.path.basename(result.image_path)
+                if not (result.ok and self.journal.is_ocr_done(filename)):
+                    self.journal.record_ocr(filename, ok=result.ok)
+        
+        return writer.text_path
+    
+    def open_text_writer(self):
+        """抽出テキストとページ索引の逐次書き出しを開始"""
+        return StreamingTextWriter(self.config.get_text_output_path())
     
-    def run_full_automation(self, max_pages=None):
-        """完全な自動化ワークフローを実行"""
+    def update_search_index(self):
+        """この書籍の抽出テキストを全文検索インデックスに反映"""
+        if not self.config.SEARCH_INDEX_ENABLED:
+            return
         try:
+            index = LibrarySearchIndex(self.config.SEARCH_INDEX_PATH)
+            try:
+                index.index_book(self.config.OUTPUT_FOLDER)
+            finally:
+                index.close()
+        except Exception as e:
+            logger.warning(f"検索インデックスの更新に失敗: {e}")
+    
+    def build_searchable_pdf(self, screenshots):
+        """OCR時に作成したページごとのPDFをページ順に結合（無効な場合・結合できない場合は None）"""
+        pdf_folder = self.config.get_pdf_pages_folder_path()
+        if not pdf_folder:
+            return None
+        page_pdfs = [page_pdf_path(pdf_folder, path) for path in screenshots]
+        return merge_page_pdfs(page_pdfs, self.config.get_searchable_pdf_path())
+    
+    def _setup_drive_manager(self):
+        """Google Drive連携を初期化し、書籍タイトルに基づいたフォルダを用意"""
+        drive_manager = GoogleDriveManager()
+        
+        book_folder_id = drive_manager.setup_book_folder(self.config.BOOK_TITLE)
+        if not book_folder_id:
+            logger.warning("Google Driveフォルダの作成に失敗しました。デフォルトフォルダにアップロードします。")
+        return drive_manager
+    
+    def open_journal(self, resume=False):
+        """書籍のチェックポイントジャーナルを開き、新規実行か再開かを記録"""
+        self.journal = CheckpointJournal(self.config.OUTPUT_FOLDER)
+        if resume and not self.journal.can_resume:
+            logger.info("再開できる中断記録がないため最初から処理します")
+            resume = False
+        self.journal.start_run(resume=resume)
+        return resume
+    
+    def _upload_pending_screenshots(self, drive_manager, screenshots):
+        """アップロード済みでないスクリーンショットだけをアップロード"""
+        journal = self.journal
+        pending = [path for path in screenshots
+                   if not (journal and journal.is_uploaded(os.path.basename(path)))]
+        if len(pending) < len(screenshots):
+            logger.info(f"アップロード済みの{len(screenshots) - len(pending)}ファイルをスキップします")
+        
+        def record_upload(path, file_id):
+            if journal:
+                journal.record_upload(os.path.basename(path), file_id)
+        
+        return drive_manager.upload_screenshots(pending, on_uploaded=record_upload)
+    
+    def open_page_archive(self, resume=False):
+        """ページ画像アーカイブを開く（無効な場合は None）
+        
+        再開時は撮影済みのページを追加し直し、新規実行時は前回のアーカイブを破棄する。
+        """
+        if not self.config.PAGE_ARCHIVE_ENABLED:
+            return None
+        archive_path = self.config.get_archive_path()
+        if not resume and os.path.exists(archive_path):
+            os.remove(archive_path)
+        archive = PageArchive(archive_path)
+        if resume and self.journal:
+            screenshots_folder = self.config.get_screenshots_folder_path()
+            for name in self.journal.captured_files():
+                self._add_to_archive(archive, os.path.join(screenshots_folder, name))
+        return archive
+    
+    def _add_to_archive(self, archive, image_path):
+        try:
+            archive.add(image_path)
+        except Exception as e:
+            logger.error(f"アーカイブへの追加に失敗 {image_path}: {e}")
+    
+    def _upload_page_archive(self, drive_manager, archive):
+        """アーカイブを閉じて、索引とあわせてGoogle Driveにアップロード"""
+        archive.close()
+        for path in (archive.archive_path, archive.index_path):
+            drive_manager.upload_file(path, os.path.basename(path), use_book_folder=True)
+    
+    def run_full_automation(self, max_pages=None, resume=False):
+        """完全な自動化ワークフローを実行
+        
+        resume: 前回中断した実行の続きから再開する（撮影済み・OCR済み・アップロード済みの作業を飛ばす）
+        """
+        try:
+            resume = self.open_journal(resume)
+            
+            # Kindleの操作中に認証情報とDriveクライアントの準備を済ませておく
+            google_drive_manager.warm_up(self.config)
+            
             # 1. Kindleアプリを開いて書籍を開く
             if not self.open_kindle_and_book():
                 return False
@@ -371,31 +830,90 @@ class KindleAutomation:
             else:
                 logger.warning("総ページ数が不明です。手動でページ数を指定してください。")
             
-            # 3. 全ページのスクリーンショット撮影
-            logger.info("📸 スクリーンショット撮影を開始します...")
-            screenshots = self.capture_all_pages(max_pages, total_pages)
-            if not screenshots:
-                logger.error("スクリーンショットが撮影できませんでした")
-                return False
-            
-            # 4. Google Driveに書籍フォルダを作成してアップロード
-            drive_manager = GoogleDriveManager()
-            
-            # 書籍タイトルに基づいたフォルダを作成
-            book_folder_id = drive_manager.setup_book_folder(self.config.BOOK_TITLE)
-            if not book_folder_id:
-                logger.warning("Google Driveフォルダの作成に失敗しました。デフォルトフォルダにアップロードします。")
-            
-            uploaded_files = drive_manager.upload_screenshots(screenshots)
-            
-            # 5. OCRでテキスト抽出
-            full_text = self.extract_text_from_all_images(screenshots)
+            # ページ画像をアーカイブにまとめる場合は撮影しながら追記する
+            archive = self.open_page_archive(resume)
+            
+            if self.config.PIPELINE_MODE:
+                # 3〜6. 撮影しながらOCRとアップロードを並行実行（テキストはOCRが済んだページから書き出す）
+                drive_manager = self._setup_drive_manager()
+                text_writer = self.open_text_writer()
+                pipeline = PagePipeline(
+                    lang=self.config.OCR_LANGUAGE,
+                    tesseract_path=self.config.TESSERACT_PATH,
+                    ocr_workers=self.config.OCR_WORKERS,
+                    drive_manager=None if archive else drive_manager,
+                    queue_size=self.config.PIPELINE_QUEUE_SIZE,
+                    cache=self.get_ocr_cache(),
+                    journal=self.journal,
+                    upload_workers=self.config.DRIVE_UPLOAD_WORKERS,
+                    pdf_folder=self.config.get_pdf_pages_folder_path(),
+                    ocr_batch_size=self.config.OCR_BATCH_SIZE,
+                    preprocess=self.get_preprocess_options(),
+                    on_result=text_writer.add,
+                )
+                pipeline.start()
+                try:
+                    if resume:
+                        # 撮影済みページを先に流す（OCRはキャッシュから、アップロード済みは送らない）
+                        screenshots_folder = self.config.get_screenshots_folder_path()
+                        # 前回保存に失敗したページはOCR結果が届かないので、テキストは欠番にしておく
+                        for index in self.journal.missing_page_indexes():
+                            text_writer.skip(index)
+                        for name in self.journal.captured_files():
+                            pipeline.submit(self.journal.pages[name]['index'],
+                                            os.path.join(screenshots_folder, name),
+                                            upload=not self.journal.is_uploaded(name))
+                    
+                    def on_page_saved(index, image_path):
+                        if archive:
+                            self._add_to_archive(archive, image_path)
+                        pipeline.submit(index, image_path)
+                    
+                    def on_page_failed(index, image_path):
+                        # 保存できなかったページのOCR結果は届かないので、テキストは欠番にして先に進める
+                        text_writer.skip(index)
+                    
+                    logger.info("📸 スクリーンショット撮影を開始します（OCR・アップロードを並行実行）...")
+                    screenshots = self.capture_all_pages(max_pages, total_pages, on_page_saved=on_page_saved,
+                                                         on_page_failed=on_page_failed)
+                finally:
+                    pipeline.finish()
+                    text_writer.close()
+                if not screenshots:
+                    logger.error("スクリーンショットが撮影できませんでした")
+                    return False
+                
+                if archive:
+                    self._upload_page_archive(drive_manager, archive)
+            else:
+                # 3. 全ページのスクリーンショット撮影
+                logger.info("📸 スクリーンショット撮影を開始します...")
+                on_page_saved = (lambda index, image_path: self._add_to_archive(archive, image_path)) if archive else None
+                screenshots = self.capture_all_pages(max_pages, total_pages, on_page_saved=on_page_saved)
+                if not screenshots:
+                    logger.error("スクリーンショットが撮影できませんでした")
+                    return False
+                
+                # 4. Google Driveに書籍フォルダを作成してアップロード（アーカイブの場合は1ファイル）
+                drive_manager = self._setup_drive_manager()
+                if archive:
+                    self._upload_page_archive(drive_manager, archive)
+                else:
+                    uploaded_files = self._upload_pending_screenshots(drive_manager, screenshots)
+                
+                # 5. OCRでテキスト抽出
+                self.extract_text_from_all_images(screenshots)
             
-            # 6. 抽出テキストをGoogle Driveに保存
+            # 6. 抽出テキスト（と検索可能PDF）をGoogle Driveに保存
             text_path = self.config.get_text_output_path()
             drive_manager.upload_file(text_path, "extracted_text.txt", use_book_folder=True)
+            pdf_path = self.build_searchable_pdf(screenshots)
+            if pdf_path:
+                drive_manager.upload_file(pdf_path, os.path.basename(pdf_path), use_book_folder=True)
             
             logger.info("テキスト抽出とGoogle Driveアップロードが完了しました")
+            self.journal.record_complete()
+            self.update_search_index()
             
             logger.info("自動化ワークフローが完了しました")
             return True
@@ -419,6 +937,9 @@ if __name__ == "__main__":
     automation = KindleAutomation()
     automation.config.set_book_title(book_title)
     
+    # 書籍タイトルに基づいたディレクトリを作成
+    automation.setup_directories()
+    
     print(f"書籍タイトル: {book_title}")
     print()
     
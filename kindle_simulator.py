@@ -0,0 +1,222 @@
+import os
+import time
+import random
+import logging
+import threading
+
+from lazy_import import lazy_import
+from screen_capture import PyAutoGUICapture
+
+Image = lazy_import('PIL.Image')
+ImageDraw = lazy_import('PIL.ImageDraw')
+ImageFont = lazy_import('PIL.ImageFont')
+
+logger = logging.getLogger(__name__)
+
+_WORDS = ("kindle page text book chapter reading light night story river mountain "
+          "window letter morning garden silence memory journey harbor winter paper "
+          "voice shadow market station island forest summer bridge candle lantern").split()
+
+
+class SimulatedKindle:
+    """Kindleアプリの画面とキー入力を模擬する（macOS・実機なしで撮影ループを動かす）
+
+    pyautogui と同じ screenshot / press / hotkey を持ち、KindleAutomation のキー入力（screen）と
+    画面取得（capture）に差し替えて使う。
+    ページは PIL で描画した架空の本文で、矢印キーでめくれる。
+
+    render_latency: キー入力から新しいページが描画し終わるまでの時間（秒）。
+        前半は元のページ、後半は描画途中（本文の上半分だけ）のフレームを返す
+    drop_rate: キー入力が無視される確率（取りこぼしの再試行を確認する）
+    direction: ページが進む矢印キー（'right' または 'left'）
+    chapter_pages: 章の始まりのページ番号（本文が画面の下半分からしかない）
+    最終ページで進むキーを押しても何も変わらない（書籍の終了）。
+    """
+
+    def __init__(self, total_pages=50, size=(1280, 800), render_latency=0.3, drop_rate=0.0,
+                 direction='right', seed=0, chapter_pages=()):
+        self.total_pages = total_pages
+        self.size = size
+        self.render_latency = render_latency
+        self.drop_rate = drop_rate
+        self.direction = direction
+        self.chapter_pages = set(chapter_pages)
+        self._random = random.Random(seed)
+        self._seed = seed
+        self._lock = threading.Lock()
+        self._pages = {}  # 描画済みページ（ページ番号 -> 画像）
+        self._font = None
+
+        self.page = 0
+        self._previous_page = 0
+        self._turned_at = None
+        self.key_presses = 0
+        self.dropped_keys = 0
+        self.screenshot_count = 0
+
+    # --- pyautogui 互換 ---
+
+    def screenshot(self):
+        """現在の画面（描画途中を含む）を返す"""
+        with self._lock:
+            self.screenshot_count += 1
+            page, rendering = self._visible_state()
+        image = self.render_page(page)
+        if rendering:
+            # 描画途中: 元のページの上に新しいページの上半分だけが描かれている
+            partial = self.render_page(self._previous_page).copy()
+            half = (0, 0, self.size[0], self.size[1] // 2)
+            partial.paste(image.crop(half), half)
+            return partial
+        return image.copy()
+
+    def press(self, key):
+        """キー入力（進む・戻る矢印キー以外は無視）"""
+        with self._lock:
+            self.key_presses += 1
+            step = self._step_for(key)
+            if step == 0:
+                return
+            if self.drop_rate and self._random.random() < self.drop_rate:
+                self.dropped_keys += 1
+                logger.debug(f"シミュレータ: キー入力を取りこぼしました（{key}）")
+                return
+            target = self.page + step
+            if not 0 <= target < self.total_pages:
+                return
+            self._previous_page, self.page = self._visible_state()[0], target
+            self._turned_at = time.monotonic()
+
+    def hotkey(self, *keys):
+        """ショートカットキー（書籍情報などは表示しない）"""
+        with self._lock:
+            self.key_presses += 1
+
+    # --- 画面の描画 ---
+
+    def _step_for(self, key):
+        backward = 'left' if self.direction == 'right' else 'right'
+        return 1 if key == self.direction else -1 if key == backward else 0
+
+    def _visible_state(self):
+        """(表示中のページ, 描画途中か) を返す"""
+        if self._turned_at is None:
+            return self.page, False
+        elapsed = time.monotonic() - self._turned_at
+        if elapsed >= self.render_latency:
+            return self.page, False
+        if elapsed < self.render_latency / 2:
+            return self._previous_page, False
+        return self.page, True
+
+    def render_page(self, page):
+        """ページ画像を描画（ページごとに1回だけ描画して使い回す）"""
+        image = self._pages.get(page)
+        if image is None:
+            image = self._draw_page(page)
+            self._pages[page] = image
+        return image
+
+    def _draw_page(self, page):
+        width, height = self.size
+        font_size = max(12, height // 40)
+        font = self._get_font(font_size)
+        rng = random.Random(f"{self._seed}:{page}")
+
+        # 白に近いウィンドウ余白とツールバー、白い本文領域（余白は本文領域の検出で文字とみなされない）
+        image = Image.new('RGB', self.size, (245, 245, 245))
+        draw = ImageDraw.Draw(image)
+        draw.rectangle((0, 0, width, height // 20), fill=(235, 235, 235))
+        margin_x, margin_y = width // 8, height // 10
+        draw.rectangle((margin_x // 2, height // 20 + 4, width - margin_x // 2, height - 4), fill='white')
+
+        # 段落ごとに行の長さ・字下げが変わる本文（ページごとに見た目が大きく異なる）
+        line_height = int(font_size * 1.6)
+        y = height * 55 // 100 if page in self.chapter_pages else margin_y
+        while y < height - margin_y - line_height:
+            if rng.random() < 0.15:
+                y += line_height  # 段落の区切り
+                continue
+            indent = margin_x + rng.randint(0, 4) * font_size
+            words = rng.randint(3, 12)
+            line = " ".join(rng.choice(_WORDS) for _ in range(words))
+            draw.text((indent, y), line, fill='black', font=font)
+            y += line_height
+
+        # フッターの位置表示
+        draw.text((width // 2 - 40, height - margin_y // 2), f"{page + 1} / {self.total_pages}",
+                  fill=(120, 120, 120), font=font)
+        return image
+
+    def _get_font(self, size):
+        if self._font is None:
+            try:
+                self._font = ImageFont.load_default(size=size)
+            except TypeError:
+                # Pillow 10.1 より前は大きさを指定できない
+                self._font = ImageFont.load_default()
+        return self._font
+
+
+class SimulatedWindowFocus:
+    """KindleWindowFocus の代わり（osascript を使わず、常に最前面とみなす）"""
+
+    def __init__(self):
+        self.activation_count = 0
+        self.window_generation = 0
+
+    def activate(self):
+        self.activation_count += 1
+        return True
+
+    def ensure_focus(self):
+        return True
+
+
+class SimulatedDriveManager:
+    """GoogleDriveManager の代わり（アップロードせず、指定した時間だけ待ってIDを返す）"""
+
+    def __init__(self, upload_latency=0.0):
+        self.upload_latency = upload_latency
+        self.book_folder_id = "simulated-folder"
+        self.uploaded = []
+        self._lock = threading.Lock()
+
+    def setup_book_folder(self, book_title):
+        return self.book_folder_id
+
+    def upload_file_or_raise(self, file_path, filename=None, use_book_folder=True):
+        if self.upload_latency:
+            time.sleep(self.upload_latency)
+        with self._lock:
+            self.uploaded.append(filename or os.path.basename(file_path))
+            return f"simulated-{len(self.uploaded)}"
+
+    def upload_file(self, file_path, filename=None, use_book_folder=True):
+        return self.upload_file_or_raise(file_path, filename, use_book_folder)
+
+    def upload_screenshots(self, screenshot_paths, on_uploaded=None):
+        file_ids = []
+        for path in screenshot_paths:
+            file_id = self.upload_file_or_raise(path)
+            if on_uploaded:
+                on_uploaded(path, file_id)
+            file_ids.append(file_id)
+        return file_ids
+
+
+def attach_simulator(automation, kindle, drive_manager=None, report_total_pages=True):
+    """KindleAutomation の画面・キー入力・ウィンドウ操作・Google Driveをシミュレータに差し替える
+
+    Kindleアプリの起動と書籍情報のOCRは行わない。report_total_pages=False の場合は
+    総ページ数を不明として扱い、書籍の終了をページが変わらなくなったことで検出させる。
+    """
+    drive_manager = drive_manager or SimulatedDriveManager()
+    automation.screen = kindle
+    automation.capture = PyAutoGUICapture(kindle)
+    automation.focus = SimulatedWindowFocus()
+    automation.kindle_launched = True
+    automation.open_kindle_and_book = lambda: True
+    automation.get_total_pages = lambda: kindle.total_pages if report_total_pages else None
+    automation._setup_drive_manager = lambda: drive_manager
+    return automation
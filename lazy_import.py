@@ -0,0 +1,47 @@
+import importlib
+import threading
+
+
+class LazyModule:
+    """属性に初めてアクセスしたときに実際のモジュールを読み込む代理オブジェクト
+
+    cv2・pytesseract・pyautogui・Google APIクライアントなどは読み込みだけで
+    数百ミリ秒かかるため、設定確認だけの起動では読み込まないようにする。
+    on_import を指定すると、読み込み直後に1度だけモジュールを渡して呼び出す。
+    """
+
+    def __init__(self, name, on_import=None):
+        object.__setattr__(self, '_lazy_name', name)
+        object.__setattr__(self, '_lazy_on_import', on_import)
+        object.__setattr__(self, '_lazy_module', None)
+        object.__setattr__(self, '_lazy_lock', threading.Lock())
+
+    def _lazy_load(self):
+        module = self._lazy_module
+        if module is None:
+            with self._lazy_lock:
+                module = self._lazy_module
+                if module is None:
+                    module = importlib.import_module(self._lazy_name)
+                    if self._lazy_on_import:
+                        self._lazy_on_import(module)
+                    object.__setattr__(self, '_lazy_module', module)
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._lazy_load(), attr)
+
+    def __setattr__(self, attr, value):
+        setattr(self._lazy_load(), attr, value)
+
+    def __dir__(self):
+        return dir(self._lazy_load())
+
+    def __repr__(self):
+        state = "読み込み済み" if self._lazy_module is not None else "未読み込み"
+        return f"<LazyModule {self._lazy_name}（{state}）>"
+
+
+def lazy_import(name, on_import=None):
+    """モジュールを初回使用時に読み込む代理オブジェクトを返す"""
+    return LazyModule(name, on_import=on_import)
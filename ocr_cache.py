@@ -0,0 +1,93 @@
+import os
+import time
+import hashlib
+import logging
+import sqlite3
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class OCRCache:
+    """画像内容で引くOCR結果の永続キャッシュ（SQLite）
+
+    キーは画像ファイルのバイト列とOCR言語・オプションのハッシュなので、
+    ファイル名やフォルダが変わっても同じ画像なら再利用できる。
+    保存テキストの合計サイズが上限を超えると、最後に参照された時刻が古いものから削除する。
+    """
+
+    def __init__(self, db_path, max_bytes=200 * 1024 * 1024):
+        self.db_path = db_path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        # パイプラインのコールバックスレッドからも使うためロックで直列化する
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS ocr_cache (
+                key TEXT PRIMARY KEY,
+                text TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                last_access REAL NOT NULL
+            )
+        ''')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS idx_ocr_cache_access ON ocr_cache (last_access)')
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(image_path, lang, options=""):
+        """画像のバイト列とOCR設定からキャッシュキーを作成"""
+        digest = hashlib.sha256()
+        with open(image_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+        digest.update(f"\0{lang}\0{options}".encode('utf-8'))
+        return digest.hexdigest()
+
+    def get(self, key):
+        """キャッシュ済みのテキストを返す（なければ None）"""
+        with self._lock:
+            row = self._conn.execute('SELECT text FROM ocr_cache WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute('UPDATE ocr_cache SET last_access = ? WHERE key = ?', (time.time(), key))
+            self._conn.commit()
+            self.hits += 1
+            return row[0]
+
+    def put(self, key, text):
+        """OCR結果を保存し、必要なら古いものを削除"""
+        size = len(text.encode('utf-8'))
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO ocr_cache (key, text, size, last_access) VALUES (?, ?, ?, ?)',
+                (key, text, size, time.time()))
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        """合計サイズが上限を超えていれば、参照の古いものから上限の9割まで削除"""
+        total = self._conn.execute('SELECT COALESCE(SUM(size), 0) FROM ocr_cache').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        target = self.max_bytes * 0.9
+        removed = 0
+        for key, size in self._conn.execute(
+                'SELECT key, size FROM ocr_cache ORDER BY last_access').fetchall():
+            if total <= target:
+                break
+            self._conn.execute('DELETE FROM ocr_cache WHERE key = ?', (key,))
+            total -= size
+            removed += 1
+        logger.info(f"OCRキャッシュから{removed}件を削除しました")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
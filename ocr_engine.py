@@ -0,0 +1,277 @@
+import os
+import logging
+import tempfile
+import subprocess
+from dataclasses import dataclass, replace
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from lazy_import import lazy_import
+from ocr_preprocess import write_preprocessed
+
+Image = lazy_import('PIL.Image')
+pytesseract = lazy_import('pytesseract')
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class OCRResult:
+    """1ページ分のOCR結果"""
+    index: int
+    image_path: str
+    text: str = ""
+    error: str = None
+    cached: bool = False
+
+    @property
+    def ok(self):
+        return self.error is None
+
+
+def init_ocr_worker(tesseract_path):
+    """OCRワーカープロセスの初期化"""
+    pytesseract.pytesseract.tesseract_cmd = tesseract_path
+    # プロセス単位で並列化するため、tesseract内部のスレッド並列は無効化する
+    os.environ['OMP_THREAD_LIMIT'] = '1'
+
+
+def ocr_image_file(image_path, lang, pdf_path=None):
+    """画像ファイル1枚をOCRしてテキストを返す（ワーカープロセスで実行）
+
+    pdf_path を指定した場合は同じtesseractの実行で検索可能PDFも作成する。
+    """
+    if pdf_path:
+        return ocr_image_file_with_pdf(image_path, lang, pdf_path)
+    with Image.open(image_path) as image:
+        text = pytesseract.image_to_string(image, lang=lang)
+    return text.strip()
+
+
+def ocr_image_file_with_pdf(image_path, lang, pdf_path):
+    """1回のtesseract実行でテキストと検索可能PDF（画像＋透明テキスト層）を作成"""
+    output_base = os.path.splitext(pdf_path)[0]
+    command = [pytesseract.pytesseract.tesseract_cmd, image_path, output_base,
+               '-l', lang, 'txt', 'pdf']
+    result = subprocess.run(command, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"tesseractの実行に失敗しました: {result.stderr.strip()}")
+    text_path = output_base + '.txt'
+    with open(text_path, 'r', encoding='utf-8') as f:
+        text = f.read()
+    os.remove(text_path)
+    return text.strip()
+
+
+def page_pdf_path(pdf_folder, image_path):
+    """ページ画像に対応するページ単位PDFのパス（pdf_folder が None の場合は None）"""
+    if not pdf_folder:
+        return None
+    name = os.path.splitext(os.path.basename(image_path))[0]
+    return os.path.join(pdf_folder, name + '.pdf')
+
+
+def ocr_worker(image_path, lang, pdf_path=None):
+    """ワーカー用のOCR関数
+
+    pytesseractの例外にはプロセス間で復元できないものがあるため、
+    (テキスト, エラーメッセージ) の組で返す。
+    """
+    try:
+        return ocr_image_file(image_path, lang, pdf_path), None
+    except Exception as e:
+        return "", f"{type(e).__name__}: {e}"
+
+
+def ocr_image_files(image_paths, lang):
+    """複数の画像を1回のtesseract実行でOCRし、画像ごとのテキストを返す
+
+    画像パスを並べたリストファイルを入力にすると、tesseractは言語モデルを1度だけ読み込んで
+    全ページを処理し、ページの区切りに改ページ文字（\\f）を出力する。
+    """
+    if len(image_paths) == 1:
+        return [ocr_image_file(image_paths[0], lang)]
+    with tempfile.TemporaryDirectory(prefix="ocr_batch_") as work_dir:
+        list_path = os.path.join(work_dir, 'pages.txt')
+        with open(list_path, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(os.path.abspath(path) for path in image_paths) + '\n')
+        output_base = os.path.join(work_dir, 'out')
+        command = [pytesseract.pytesseract.tesseract_cmd, list_path, output_base, '-l', lang]
+        result = subprocess.run(command, capture_output=True, text=True)
+        if result.returncode != 0:
+            raise RuntimeError(f"tesseractの実行に失敗しました: {result.stderr.strip()}")
+        with open(output_base + '.txt', 'r', encoding='utf-8') as f:
+            pages = f.read().split('\f')
+    if len(pages) < len(image_paths):
+        raise RuntimeError(f"OCR結果のページ数が一致しません（{len(pages)} / {len(image_paths)}）")
+    return [page.strip() for page in pages[:len(image_paths)]]
+
+
+def ocr_batch_worker(image_paths, lang, pdf_paths=None, preprocess=None):
+    """ワーカー用の一括OCR関数（画像ごとの (テキスト, エラーメッセージ) のリストを返す）
+
+    preprocess（PreprocessOptions）を指定した場合は、前処理した一時画像をOCRする。
+    検索可能PDFを作成する場合はページごとにPDFが必要なため1枚ずつ処理し、
+    PDFの画像がページそのものになるよう前処理はしない。
+    一括処理に失敗した場合も、どのページが原因か分かるよう1枚ずつ処理し直す。
+    """
+    if preprocess and not pdf_paths:
+        with tempfile.TemporaryDirectory(prefix="ocr_preprocess_") as work_dir:
+            inputs = []
+            for i, image_path in enumerate(image_paths):
+                try:
+                    inputs.append(write_preprocessed(image_path, os.path.join(work_dir, f"{i:04d}.png"),
+                                                     preprocess))
+                except Exception as e:
+                    logger.warning(f"前処理に失敗したため元の画像をOCRします {image_path}: {e}")
+                    inputs.append(image_path)
+            return _ocr_batch(inputs, lang, pdf_paths)
+    return _ocr_batch(image_paths, lang, pdf_paths)
+
+
+def _ocr_batch(image_paths, lang, pdf_paths):
+    if not pdf_paths and len(image_paths) > 1:
+        try:
+            return [(text, None) for text in ocr_image_files(image_paths, lang)]
+        except Exception as e:
+            logger.warning(f"一括OCRに失敗したため1枚ずつ処理します: {e}")
+    pdf_paths = pdf_paths or [None] * len(image_paths)
+    return [ocr_worker(image_path, lang, pdf_path)
+            for image_path, pdf_path in zip(image_paths, pdf_paths)]
+
+
+def split_batches(items, batch_size, workers=1):
+    """一括OCRの単位に分割（全ワーカーに仕事が行き渡るよう、ワーカー数より少なくしない）"""
+    batch_size = max(1, min(batch_size, -(-len(items) // max(1, workers))))
+    return [items[i:i + batch_size] for i in range(0, len(items), batch_size)]
+
+
+def resolve_worker_count(workers):
+    """設定値からワーカー数を決定（0以下はCPUコア数）"""
+    if workers is None or workers <= 0:
+        return os.cpu_count() or 1
+    return workers
+
+
+class ParallelOCR:
+    """プロセスプールで複数ページを並列にOCRする
+
+    結果は入力順に返し、進捗の通知（progress_callback）も入力順に行う。
+    プールが使えない環境やワーカーが異常終了した場合は残りのページを逐次処理に切り替える。
+    """
+
+    def __init__(self, lang, tesseract_path, workers=0, cache=None, cache_options="", pdf_folder=None,
+                 batch_size=1, preprocess=None):
+        """
+        cache: OCRCache（指定した場合はOCR前に参照し、結果を保存する）
+        cache_options: キャッシュキーに含めるOCR設定（設定変更時に古い結果を使わないため）
+        pdf_folder: 指定した場合はページごとの検索可能PDFをこのフォルダに作成する
+        batch_size: 1回のtesseract実行でOCRする最大ページ数
+        preprocess: PreprocessOptions（ワーカー内でOCR前に画像を前処理する）
+        """
+        self.lang = lang
+        self.tesseract_path = tesseract_path
+        self.workers = resolve_worker_count(workers)
+        self.batch_size = max(1, batch_size)
+        self.cache = cache
+        # 検索可能PDFを作る場合は前処理しない（ocr_batch_worker と同じ判断）
+        if pdf_folder:
+            preprocess = None
+        # 前処理の設定が変わったら別のOCR結果として扱う
+        self.cache_options = cache_options + (preprocess.cache_key() if preprocess else "")
+        self.preprocess = preprocess
+        self.pdf_folder = pdf_folder
+        if pdf_folder:
+            os.makedirs(pdf_folder, exist_ok=True)
+
+    def run(self, image_paths, progress_callback=None, keep_text=True):
+        """全画像をOCRし、入力順の OCRResult リストを返す
+
+        keep_text=False の場合、テキストは progress_callback にだけ渡し、返す結果には含めない
+        （逐次書き出す場合に、書籍の長さによらずメモリ使用量を一定に保つため）。
+        """
+        results = [None] * len(image_paths)
+        cache_keys = [None] * len(image_paths)
+        next_index = 0
+
+        def deliver(result):
+            nonlocal next_index
+            self._store(results, result, cache_keys)
+            # キャッシュ済みのページが先に揃っても、手前のページのOCRが終わるまで通知しない
+            while next_index < len(results) and results[next_index] is not None:
+                if progress_callback:
+                    progress_callback(results[next_index])
+                if not keep_text:
+                    results[next_index] = replace(results[next_index], text="")
+                next_index += 1
+
+        self._lookup_cache(image_paths, cache_keys, deliver)
+
+        pending = [i for i, result in enumerate(results) if result is None]
+        if self.workers > 1 and len(pending) > 1:
+            try:
+                self._run_parallel(image_paths, pending, deliver)
+            except (BrokenProcessPool, OSError) as e:
+                logger.warning(f"並列OCRが利用できないため逐次処理に切り替えます: {e}")
+
+        # 並列処理されなかったページ（またはフォールバック分）を逐次処理
+        pending = [i for i, result in enumerate(results) if result is None]
+        if pending:
+            pytesseract.pytesseract.tesseract_cmd = self.tesseract_path
+            for batch in split_batches(pending, self.batch_size):
+                outputs = self._ocr_batch(image_paths, batch)
+                for i, (text, error) in zip(batch, outputs):
+                    deliver(OCRResult(i, image_paths[i], text=text, error=error))
+
+        return results
+
+    def _store(self, results, result, cache_keys):
+        """1ページの結果を格納し、新たにOCRした結果はキャッシュに保存"""
+        key = cache_keys[result.index]
+        if self.cache and key and result.ok and not result.cached:
+            self.cache.put(key, result.text)
+        results[result.index] = result
+
+    def _lookup_cache(self, image_paths, cache_keys, deliver):
+        """ページごとのキャッシュキーを求め、キャッシュ済みのページの結果を渡す"""
+        if not self.cache:
+            return
+        cached = 0
+        for i, image_path in enumerate(image_paths):
+            try:
+                cache_keys[i] = self.cache.make_key(image_path, self.lang, self.cache_options)
+            except OSError:
+                continue
+            # PDFを作成する場合は、PDFがまだないページはキャッシュがあってもOCRする
+            pdf_path = page_pdf_path(self.pdf_folder, image_path)
+            if pdf_path and not os.path.exists(pdf_path):
+                continue
+            text = self.cache.get(cache_keys[i])
+            if text is not None:
+                deliver(OCRResult(i, image_path, text=text, cached=True))
+                cached += 1
+        if cached:
+            logger.info(f"OCRキャッシュを使用: {cached}/{len(image_paths)}ページ")
+
+    def _run_parallel(self, image_paths, indexes, deliver):
+        """プロセスプールでOCRを実行"""
+        batches = split_batches(indexes, self.batch_size, self.workers)
+        logger.info(f"{self.workers}プロセスで並列OCRを実行します（{len(batches)}回のtesseract実行）")
+        with ProcessPoolExecutor(max_workers=self.workers,
+                                 initializer=init_ocr_worker,
+                                 initargs=(self.tesseract_path,)) as executor:
+            futures = [(executor.submit(ocr_batch_worker, *self._batch_args(image_paths, batch)), batch)
+                       for batch in batches]
+            for future, batch in futures:
+                for i, (text, error) in zip(batch, future.result()):
+                    deliver(OCRResult(i, image_paths[i], text=text, error=error))
+
+    def _batch_args(self, image_paths, batch):
+        """ocr_batch_worker に渡す引数"""
+        paths = [image_paths[i] for i in batch]
+        pdf_paths = [page_pdf_path(self.pdf_folder, path) for path in paths] if self.pdf_folder else None
+        return paths, self.lang, pdf_paths, self.preprocess
+
+    def _ocr_batch(self, image_paths, batch):
+        """現在のプロセスでまとめてOCR"""
+        return ocr_batch_worker(*self._batch_args(image_paths, batch))
@@ -0,0 +1,94 @@
+import logging
+from dataclasses import dataclass
+
+from lazy_import import lazy_import
+
+cv2 = lazy_import('cv2')
+np = lazy_import('numpy')
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class PreprocessOptions:
+    """OCR前処理の設定
+
+    grayscale: グレースケール化（binarize の場合は常に行う）
+    binarize: 適応的二値化（背景色のムラやアンチエイリアスを除く）
+    block_size, c: 適応的二値化の近傍サイズ（奇数）と閾値からの差し引き
+    crop_margins: 文字のない余白を切り落とす（margin_padding 画素だけ残す）
+    invert: 'auto' で暗い背景（ダークモード）を判定して反転、True/False で常に反転/しない
+    source_dpi, target_dpi: 画面の想定DPIを指定のDPIに拡大縮小する（どちらかが0または同じなら何もしない。
+        拡大は画素数が増えて前処理・OCRとも遅くなるため、文字が小さすぎる場合だけ指定する）
+    """
+    grayscale: bool = True
+    binarize: bool = True
+    block_size: int = 31
+    c: int = 15
+    crop_margins: bool = True
+    margin_padding: int = 10
+    invert: object = 'auto'
+    source_dpi: int = 144
+    target_dpi: int = 0
+
+    def cache_key(self):
+        """OCRキャッシュのキーに含める文字列（設定が変わったら別の結果として扱う）"""
+        return (f"pre:gray={int(self.grayscale)},bin={int(self.binarize)}/{self.block_size}/{self.c},"
+                f"crop={int(self.crop_margins)}/{self.margin_padding},invert={self.invert},"
+                f"dpi={self.source_dpi}>{self.target_dpi}")
+
+
+def preprocess_image(image_path, options):
+    """画像ファイルを読み込んで前処理し、OpenCVの配列を返す"""
+    grayscale = options.grayscale or options.binarize
+    # 日本語を含むパスでも読めるよう、バイト列から復号する
+    data = np.fromfile(image_path, dtype=np.uint8)
+    image = cv2.imdecode(data, cv2.IMREAD_GRAYSCALE if grayscale else cv2.IMREAD_COLOR)
+    if image is None:
+        raise ValueError(f"画像を読み込めません: {image_path}")
+    gray = image if grayscale else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+
+    # 暗い背景に明るい文字（ダークモード）は反転して白背景・黒文字にそろえる
+    invert = options.invert
+    if invert == 'auto':
+        invert = bool(np.median(gray) < 128)
+    if invert:
+        image = cv2.bitwise_not(image)
+        gray = image if grayscale else cv2.bitwise_not(gray)
+
+    if options.crop_margins:
+        image = _crop_margins(image, gray, options.margin_padding)
+
+    if options.source_dpi and options.target_dpi and options.source_dpi != options.target_dpi:
+        scale = options.target_dpi / options.source_dpi
+        height, width = image.shape[:2]
+        interpolation = cv2.INTER_CUBIC if scale > 1 else cv2.INTER_AREA
+        image = cv2.resize(image, (max(1, round(width * scale)), max(1, round(height * scale))),
+                           interpolation=interpolation)
+
+    if options.binarize:
+        block_size = options.block_size | 1
+        image = cv2.adaptiveThreshold(image, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
+                                      cv2.THRESH_BINARY, block_size, options.c)
+    return image
+
+
+def _crop_margins(image, gray, padding):
+    """文字（背景より暗い画素）を含む範囲だけを残す"""
+    # 大津の二値化で文字を抽出し、小さなノイズは収縮・膨張で消す
+    _, ink = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+    ink = cv2.morphologyEx(ink, cv2.MORPH_OPEN, np.ones((2, 2), np.uint8))
+    points = cv2.findNonZero(ink)
+    if points is None:
+        return image
+    x, y, w, h = cv2.boundingRect(points)
+    height, width = gray.shape
+    x1, y1 = max(0, x - padding), max(0, y - padding)
+    x2, y2 = min(width, x + w + padding), min(height, y + h + padding)
+    return image[y1:y2, x1:x2]
+
+
+def write_preprocessed(image_path, output_path, options):
+    """前処理した画像をOCR用の一時ファイルとして保存"""
+    cv2.imwrite(output_path, preprocess_image(image_path, options), [cv2.IMWRITE_PNG_COMPRESSION, 1])
+    return output_path
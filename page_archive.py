@@ -0,0 +1,97 @@
+import os
+import json
+import struct
+import logging
+import threading
+import zipfile
+
+logger = logging.getLogger(__name__)
+
+# ZIPのローカルファイルヘッダ（固定長部分）
+_LOCAL_HEADER = struct.Struct('<4s5H3L2H')
+
+
+class PageArchive:
+    """撮影したページ画像を1つのCBZ/ZIPにまとめる
+
+    ページを保存するたびに無圧縮（画像は圧縮済みのため）で追記し、
+    Google Driveには数百の小さなファイルではなくアーカイブ1つとしてアップロードする。
+    close() 時にページ名 → アーカイブ内のバイト位置の索引（JSON）を書き出すので、
+    アーカイブ全体を展開しなくても範囲指定で1ページだけ読み出せる。
+
+    途中で異常終了して中央ディレクトリが書かれていない場合は作り直す
+    （撮影済みの画像は個別ファイルとしても残っているため、再開時に追加し直せる）。
+    """
+
+    def __init__(self, archive_path, index_path=None):
+        self.archive_path = archive_path
+        self.index_path = index_path or os.path.splitext(archive_path)[0] + ".index.json"
+        self._lock = threading.Lock()
+        self._zip = self._open()
+
+    def _open(self):
+        if os.path.exists(self.archive_path):
+            # 'a' モードは壊れたファイルでも例外を出さず末尾に新しいZIPを書き足すため、先に検査する
+            if self._is_intact():
+                archive = zipfile.ZipFile(self.archive_path, 'a')
+                logger.info(f"既存のアーカイブに追記します（{len(archive.namelist())}ページ）")
+                return archive
+            logger.warning(f"アーカイブが途中で途切れているため作り直します: {self.archive_path}")
+            os.remove(self.archive_path)
+        return zipfile.ZipFile(self.archive_path, 'w')
+
+    def _is_intact(self):
+        """中央ディレクトリまで書き終えたアーカイブか"""
+        if not zipfile.is_zipfile(self.archive_path):
+            return False
+        try:
+            with zipfile.ZipFile(self.archive_path, 'r') as archive:
+                archive.infolist()
+            return True
+        except (zipfile.BadZipFile, OSError):
+            return False
+
+    def add(self, image_path, name=None):
+        """ページ画像を追加（同じ名前のページが既にあれば何もしない）"""
+        name = name or os.path.basename(image_path)
+        with self._lock:
+            if name in self._zip.NameToInfo:
+                return False
+            self._zip.write(image_path, arcname=name, compress_type=zipfile.ZIP_STORED)
+            return True
+
+    def close(self):
+        """中央ディレクトリと索引を書き出してアーカイブを閉じ、ページ数を返す"""
+        with self._lock:
+            infos = sorted(self._zip.infolist(), key=lambda info: info.filename)
+            self._zip.close()
+        pages = self._build_index(infos)
+        with open(self.index_path, 'w', encoding='utf-8') as f:
+            json.dump({'archive': os.path.basename(self.archive_path), 'pages': pages},
+                      f, ensure_ascii=False, indent=2)
+        size_mb = os.path.getsize(self.archive_path) / 1024 / 1024
+        logger.info(f"アーカイブを作成しました: {self.archive_path}（{len(pages)}ページ, {size_mb:.1f}MB）")
+        return len(pages)
+
+    def _build_index(self, infos):
+        """各ページのデータ開始位置をローカルヘッダから求める"""
+        pages = []
+        with open(self.archive_path, 'rb') as f:
+            for info in infos:
+                f.seek(info.header_offset)
+                header = _LOCAL_HEADER.unpack(f.read(_LOCAL_HEADER.size))
+                name_length, extra_length = header[-2:]
+                pages.append({
+                    'name': info.filename,
+                    'offset': info.header_offset + _LOCAL_HEADER.size + name_length + extra_length,
+                    'size': info.compress_size,
+                    'crc': f"{info.CRC:08x}",
+                })
+        return pages
+
+
+def read_page(archive_path, index_entry):
+    """索引の1項目を使ってアーカイブからページ画像のバイト列を読み出す"""
+    with open(archive_path, 'rb') as f:
+        f.seek(index_entry['offset'])
+        return f.read(index_entry['size'])
@@ -0,0 +1,117 @@
+import logging
+from dataclasses import dataclass
+
+from lazy_import import lazy_import
+from image_writer import to_gray_array, image_size
+
+cv2 = lazy_import('cv2')
+np = lazy_import('numpy')
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PageDiffResult:
+    """ページ比較の結果"""
+    similarity: float  # ROI内で変化していない画素の割合（0.0〜1.0）
+    changed_ratio: float  # ROI内で変化した画素の割合
+    bbox: tuple = None  # 変化領域のバウンディングボックス（元画像座標の x, y, w, h）
+    is_same: bool = False
+
+
+class PageDiffEngine:
+    """NumPy/OpenCVによる配列単位のページ差分エンジン
+
+    画像を縮小グレースケール配列に変換してから、差分・閾値処理・ROIマスクを
+    配列全体に対して一括で計算する。同じフレームを何度も比較する場合は
+    prepare() で変換済み配列を作っておけば比較自体はマイクロ秒オーダーで済む。
+    """
+
+    def __init__(self, size=(200, 200), roi=(0.25, 0.25, 0.75, 0.75),
+                 pixel_threshold=15, similarity_threshold=0.90, mask=None):
+        """
+        size: 比較用に縮小する (幅, 高さ)
+        roi: 比較対象とする相対矩形 (x1, y1, x2, y2)、またはそのリスト。Noneで全体
+        pixel_threshold: 画素を「変化あり」とみなす輝度差
+        similarity_threshold: この類似度を超えたら同一ページとみなす
+        mask: size と同じ形状のbool配列を直接指定する場合に使用（roiより優先）
+        """
+        self.size = tuple(size)
+        self.pixel_threshold = pixel_threshold
+        self.similarity_threshold = similarity_threshold
+        if mask is not None:
+            self.set_mask(mask)
+        else:
+            self.set_roi(roi)
+
+    def set_roi(self, roi):
+        """相対矩形（またはそのリスト）から比較マスクを作成"""
+        width, height = self.size
+        mask = np.zeros((height, width), dtype=bool)
+        if roi is None:
+            mask[:, :] = True
+        else:
+            rects = [roi] if isinstance(roi[0], (int, float)) else roi
+            for x1, y1, x2, y2 in rects:
+                mask[int(y1 * height):int(y2 * height), int(x1 * width):int(x2 * width)] = True
+        self.set_mask(mask)
+
+    def set_mask(self, mask):
+        """比較マスクを直接設定"""
+        mask = np.asarray(mask, dtype=bool)
+        width, height = self.size
+        if mask.shape != (height, width):
+            raise ValueError(f"マスクの形状が比較サイズと一致しません: {mask.shape} != {(height, width)}")
+        if not mask.any():
+            raise ValueError("マスクに比較対象の画素がありません")
+        self.mask = mask
+        self._mask_pixels = int(mask.sum())
+
+    def prepare(self, image):
+        """PIL画像またはNumPy配列を比較用の縮小グレースケール配列に変換"""
+        array = to_gray_array(image)
+        if array.shape[1::-1] == self.size:
+            return array
+        return cv2.resize(array, self.size, interpolation=cv2.INTER_AREA)
+
+    def compare(self, image1, image2, similarity_threshold=None):
+        """2つのフレームを比較して類似度と変化領域を返す
+
+        image1/image2 はPIL画像・NumPy配列・prepare() 済み配列のいずれでもよい。
+        """
+        if similarity_threshold is None:
+            similarity_threshold = self.similarity_threshold
+
+        original_size = image_size(image1)
+        small1 = self.prepare(image1)
+        small2 = self.prepare(image2)
+
+        changed = cv2.absdiff(small1, small2) > self.pixel_threshold
+        changed &= self.mask
+        changed_pixels = int(np.count_nonzero(changed))
+        changed_ratio = changed_pixels / self._mask_pixels
+        similarity = 1 - changed_ratio
+
+        bbox = None
+        if changed_pixels:
+            x, y, w, h = cv2.boundingRect(changed.view(np.uint8))
+            bbox = self._scale_bbox((x, y, w, h), original_size)
+
+        return PageDiffResult(
+            similarity=similarity,
+            changed_ratio=changed_ratio,
+            bbox=bbox,
+            is_same=similarity > similarity_threshold,
+        )
+
+    def is_same_page(self, image1, image2, similarity_threshold=None):
+        """同一ページかどうかだけを返す簡易版"""
+        return self.compare(image1, image2, similarity_threshold).is_same
+
+    def _scale_bbox(self, bbox, original_size):
+        """縮小配列上の矩形を元画像の座標に変換"""
+        x, y, w, h = bbox
+        scale_x = original_size[0] / self.size[0]
+        scale_y = original_size[1] / self.size[1]
+        return (int(x * scale_x), int(y * scale_y),
+                int(round(w * scale_x)), int(round(h * scale_y)))
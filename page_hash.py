@@ -0,0 +1,60 @@
+import logging
+
+from lazy_import import lazy_import
+from image_writer import to_gray_array
+
+cv2 = lazy_import('cv2')
+np = lazy_import('numpy')
+
+logger = logging.getLogger(__name__)
+
+
+def compute_dhash(image, hash_size=16):
+    """差分ハッシュ（dHash）を計算して整数で返す
+
+    画像を (hash_size+1) x hash_size のグレースケールに縮小し、
+    隣接画素の大小関係をビット列にする。
+    """
+    small = cv2.resize(to_gray_array(image), (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+    bits = small[:, 1:] > small[:, :-1]
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+
+def hamming_distance(hash1, hash2):
+    """2つのハッシュ間のハミング距離"""
+    return bin(hash1 ^ hash2).count('1')
+
+
+class PageHashIndex:
+    """撮影中のページの知覚ハッシュインデックス
+
+    撮影済みページのdHashを保持し、新しいフレームが直近のページと
+    ほぼ同一かどうかを判定する。ファイルには保存しない（再開時は
+    チェックポイントジャーナルに記録したハッシュから復元する）。
+    """
+
+    def __init__(self, hash_size=16, max_distance=4, window=3):
+        """
+        hash_size: dHashの一辺のサイズ（ビット数は hash_size の2乗）
+        max_distance: この距離以下を重複とみなす
+        window: 比較対象とする直近ページ数（空白ページなど離れた類似ページを誤検出しないため）
+        """
+        self.hash_size = hash_size
+        self.max_distance = max_distance
+        self.window = window
+        self.entries = []  # [(ファイル名, ハッシュ)] を撮影順に保持
+
+    def compute(self, image):
+        """画像のハッシュを計算"""
+        return compute_dhash(image, self.hash_size)
+
+    def find_duplicate(self, image_hash):
+        """直近のページに近いハッシュがあればそのファイル名を返す"""
+        for name, value in reversed(self.entries[-self.window:]):
+            if hamming_distance(image_hash, value) <= self.max_distance:
+                return name
+        return None
+
+    def add(self, name, image_hash):
+        """撮影したページを登録"""
+        self.entries.append((name, image_hash))
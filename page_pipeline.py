@@ -0,0 +1,237 @@
+import os
+import logging
+import queue
+import threading
+from dataclasses import replace
+from concurrent.futures import ProcessPoolExecutor
+
+from ocr_engine import OCRResult, init_ocr_worker, ocr_batch_worker, page_pdf_path, resolve_worker_count
+
+logger = logging.getLogger(__name__)
+
+# キュー終端の目印
+_STOP = object()
+
+
+class PagePipeline:
+    """撮影 → OCR → アップロードのパイプライン
+
+    撮影ループが保存したページを submit() で渡すと、OCRワーカーと
+    Google Driveアップロードワーカーが並行して処理する。キューには上限があり、
+    後段が詰まった場合は submit() がブロックして撮影側に背圧がかかる。
+    finish() で残りを処理し終えるまで待つ。
+    """
+
+    def __init__(self, lang, tesseract_path, ocr_workers=0, drive_manager=None, queue_size=8,
+                 cache=None, cache_options="", journal=None, upload_workers=1, pdf_folder=None,
+                 ocr_batch_size=1, preprocess=None, on_result=None):
+        self.lang = lang
+        self.tesseract_path = tesseract_path
+        self.ocr_workers = resolve_worker_count(ocr_workers)
+        self.drive_manager = drive_manager
+        self.cache = cache
+        # 検索可能PDFを作る場合は前処理しない（ocr_batch_worker と同じ判断）
+        if pdf_folder:
+            preprocess = None
+        # 前処理の設定が変わったら別のOCR結果として扱う
+        self.cache_options = cache_options + (preprocess.cache_key() if preprocess else "")
+        self.preprocess = preprocess
+        self.journal = journal
+        # OCR結果をその場で書き出すコールバック（指定した場合はテキストを保持しない）
+        self.on_result = on_result
+        self.upload_workers = max(1, upload_workers)
+        # 溜まっているページを1回のtesseract実行でOCRする最大数
+        self.ocr_batch_size = max(1, ocr_batch_size)
+        # ページごとの検索可能PDFの出力先（None の場合は作成しない）
+        self.pdf_folder = pdf_folder
+        if pdf_folder:
+            os.makedirs(pdf_folder, exist_ok=True)
+
+        self._ocr_queue = queue.Queue(maxsize=queue_size)
+        self._upload_queue = queue.Queue(maxsize=queue_size)
+        # プールに投入済みで未完了のOCRジョブ数を制限する
+        self._ocr_slots = threading.Semaphore(self.ocr_workers * 2)
+        self._lock = threading.Lock()
+
+        self.ocr_results = {}
+        self.uploaded_files = {}
+        self.failed_uploads = []
+
+        self._executor = None
+        self._threads = []
+
+    def start(self):
+        """ワーカーを起動"""
+        self._executor = ProcessPoolExecutor(max_workers=self.ocr_workers,
+                                             initializer=init_ocr_worker,
+                                             initargs=(self.tesseract_path,))
+        self._threads = [threading.Thread(target=self._ocr_loop, name="ocr-dispatcher", daemon=True)]
+        if self.drive_manager:
+            for i in range(self.upload_workers):
+                self._threads.append(threading.Thread(target=self._upload_loop,
+                                                      name=f"drive-uploader-{i}", daemon=True))
+        for thread in self._threads:
+            thread.start()
+        logger.info(f"パイプラインを開始しました（OCR: {self.ocr_workers}プロセス, "
+                    f"アップロード: {'有効' if self.drive_manager else '無効'}）")
+
+    def submit(self, index, image_path, upload=True):
+        """保存済みページを後段に渡す（キューが満杯の場合はブロック）
+
+        upload: Falseの場合はOCRのみ行う（アップロード済みのページを再開時に渡す場合）
+        """
+        self._ocr_queue.put((index, image_path))
+        if self.drive_manager and upload:
+            self._upload_queue.put((index, image_path))
+
+    def finish(self):
+        """キューを閉じて全ワーカーの完了を待ち、ページ順のOCR結果を返す"""
+        self._ocr_queue.put(_STOP)
+        if self.drive_manager:
+            for _ in range(self.upload_workers):
+                self._upload_queue.put(_STOP)
+        for thread in self._threads:
+            thread.join()
+        self._executor.shutdown(wait=True)
+
+        results = [self.ocr_results[i] for i in sorted(self.ocr_results)]
+        logger.info(f"パイプライン完了: OCR {len(results)}ページ, "
+                    f"アップロード {len(self.uploaded_files)}ファイル"
+                    f"（失敗 {len(self.failed_uploads)}）")
+        for image_path, error in self.failed_uploads:
+            logger.error(f"アップロード失敗: {image_path}: {error}")
+        return results
+
+    def _ocr_loop(self):
+        """OCRキューからページを取り出してプロセスプールに投入
+
+        キューに溜まっているページは ocr_batch_size 枚までまとめて1つのジョブにする。
+        """
+        stopped = False
+        while not stopped:
+            items = [self._ocr_queue.get()]
+            while items[-1] is not _STOP and len(items) < self.ocr_batch_size:
+                try:
+                    items.append(self._ocr_queue.get_nowait())
+                except queue.Empty:
+                    break
+            if items[-1] is _STOP:
+                items.pop()
+                stopped = True
+
+            # 1ページの失敗でディスパッチャが止まると submit() が満杯のキューで詰まるため、ここで止める
+            jobs = []
+            for index, image_path in items:
+                try:
+                    job = self._prepare_ocr_job(index, image_path)
+                except Exception as e:
+                    logger.error(f"OCRの準備に失敗 {image_path}: {e}")
+                    self._store_ocr_result(OCRResult(index, image_path, error=str(e)))
+                    continue
+                if job:
+                    jobs.append(job)
+            if jobs:
+                self._submit_ocr_jobs(jobs)
+
+        # 投入済みジョブの完了を待つ
+        for _ in range(self.ocr_workers * 2):
+            self._ocr_slots.acquire()
+
+    def _prepare_ocr_job(self, index, image_path):
+        """キャッシュにあれば結果を格納して None、なければ (番号, パス, キャッシュキー, PDFパス) を返す"""
+        # PDFを作成する場合は、PDFも作成済みのときだけキャッシュを使う
+        cache_key = None
+        pdf_path = page_pdf_path(self.pdf_folder, image_path)
+        if self.cache:
+            try:
+                cache_key = self.cache.make_key(image_path, self.lang, self.cache_options)
+            except OSError:
+                cache_key = None
+            pdf_ready = pdf_path is None or os.path.exists(pdf_path)
+            text = self.cache.get(cache_key) if cache_key and pdf_ready else None
+            if text is not None:
+                self._store_ocr_result(OCRResult(index, image_path, text=text, cached=True))
+                return None
+        return index, image_path, cache_key, pdf_path
+
+    def _submit_ocr_jobs(self, jobs):
+        """複数ページを1つのジョブとしてプロセスプールに投入"""
+        image_paths = [image_path for _, image_path, _, _ in jobs]
+        pdf_paths = [pdf_path for _, _, _, pdf_path in jobs] if self.pdf_folder else None
+        self._ocr_slots.acquire()
+        try:
+            future = self._executor.submit(ocr_batch_worker, image_paths, self.lang, pdf_paths, self.preprocess)
+        except Exception as e:
+            self._ocr_slots.release()
+            for index, image_path, _, _ in jobs:
+                self._store_ocr_result(OCRResult(index, image_path, error=str(e)))
+            return
+        future.add_done_callback(lambda f, jobs=jobs: self._on_ocr_done(f, jobs))
+
+    def _on_ocr_done(self, future, jobs):
+        """OCRジョブ完了時のコールバック
+
+        例外は呼び出し元（Future）に握りつぶされるため、枠は必ず返す
+        （返さないと finish() の完了待ちが終わらない）。
+        """
+        try:
+            try:
+                outputs = future.result()
+            except Exception as e:
+                outputs = [("", str(e))] * len(jobs)
+            for (index, image_path, cache_key, _), (text, error) in zip(jobs, outputs):
+                result = OCRResult(index, image_path, text=text, error=error)
+                if result.error:
+                    logger.error(f"OCR処理に失敗 {image_path}: {result.error}")
+                else:
+                    logger.info(f"OCR完了: ページ {index + 1}")
+                    if cache_key:
+                        try:
+                            self.cache.put(cache_key, result.text)
+                        except Exception as e:
+                            logger.warning(f"OCRキャッシュへの保存に失敗 {image_path}: {e}")
+                self._store_ocr_result(result)
+        finally:
+            # 結果を格納してから枠を返す（finish() の完了待ちと整合させるため）
+            self._ocr_slots.release()
+
+    def _store_ocr_result(self, result):
+        if self.on_result:
+            try:
+                self.on_result(result)
+                result = replace(result, text="")
+            except Exception as e:
+                # 書き出せなかったページはテキストを保持しておく
+                logger.error(f"OCR結果の書き出しに失敗 {result.image_path}: {e}")
+        with self._lock:
+            self.ocr_results[result.index] = result
+        if self.journal:
+            filename = os.path.basename(result.image_path)
+            try:
+                if not (result.ok and self.journal.is_ocr_done(filename)):
+                    self.journal.record_ocr(filename, ok=result.ok)
+            except Exception as e:
+                logger.error(f"ジャーナルへのOCR記録に失敗 {filename}: {e}")
+
+    def _upload_loop(self):
+        """アップロードキューからページを取り出してGoogle Driveに送信"""
+        while True:
+            item = self._upload_queue.get()
+            if item is _STOP:
+                break
+            index, image_path = item
+            try:
+                file_id = self.drive_manager.upload_file_or_raise(image_path, use_book_folder=True)
+            except Exception as e:
+                with self._lock:
+                    self.failed_uploads.append((image_path, str(e)))
+                continue
+            with self._lock:
+                self.uploaded_files[index] = file_id
+            if self.journal:
+                filename = os.path.basename(image_path)
+                try:
+                    self.journal.record_upload(filename, file_id)
+                except Exception as e:
+                    # ここで落ちるとアップロードスレッドが止まり、submit() が満杯のキューで待ち続ける
+                    logger.error(f"ジャーナルへのアップロード記録に失敗 {filename}: {e}")
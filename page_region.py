@@ -0,0 +1,176 @@
+import logging
+
+from lazy_import import lazy_import
+from image_writer import to_gray_array, image_size
+
+cv2 = lazy_import('cv2')
+np = lazy_import('numpy')
+Image = lazy_import('PIL.Image')
+
+logger = logging.getLogger(__name__)
+
+
+class PageRegionDetector:
+    """Kindle画面から本文領域を検出し、セッション中キャッシュする
+
+    縮小したグレースケール画像で背景色から外れた画素（文字）を抽出し、
+    モルフォロジー処理で行をつなげた塊のうち、最大の塊と同程度の幅を持つもの
+    （段落の間が空いて分かれた本文）をまとめて本文領域とみなす。
+    フッターの位置表示など幅の狭い塊は除外される。
+
+    章の始まりのページのように本文が一部にしかないページで領域を決めてしまわないよう、
+    observe() で撮影したページごとに検出して和を取り、expand() を呼んだときにだけ領域を広げる
+    （狭めることはない）。expand() はページめくりの合間にだけ呼ぶので、1回のめくりの前後の
+    フレームは必ず同じ領域で切り出される。ページの大きさが変わるのは領域が広がったときだけで、
+    撮影前の方向判定で見た2ページ分を最初に反映するため、通常は書籍の最初で揃う。
+    ウィンドウの位置・サイズが実際に変わった（window_generation または画面サイズが変わった）場合は
+    検出し直す。
+    """
+
+    def __init__(self, detect_width=640, ink_threshold=40, padding=0.02, min_area_ratio=0.1,
+                 min_block_width=0.2):
+        """
+        detect_width: 検出時に縮小する幅
+        ink_threshold: 背景色との輝度差がこれを超える画素を文字とみなす
+        padding: 検出領域の周囲に足す余白（画面サイズに対する割合）
+        min_area_ratio: 本文領域とみなす最小面積（画面に対する割合）
+        min_block_width: 本文に含める塊の最小幅（最大の塊の幅に対する割合）
+        """
+        self.detect_width = detect_width
+        self.ink_threshold = ink_threshold
+        self.padding = padding
+        self.min_area_ratio = min_area_ratio
+        self.min_block_width = min_block_width
+
+        self.region = None  # (x, y, 幅, 高さ)（元画像座標）
+        self.frame_size = None
+        self.generation = None
+        self._observed = None  # observe() で検出した領域の和（expand() で反映する）
+        self._last_image = None  # 直近に切り出した元の画像（observe() の検出用）
+
+    def detect(self, image):
+        """本文領域 (x, y, 幅, 高さ) を検出（検出できない場合は None）"""
+        width, height = image_size(image)
+        small = self._downscale(image)
+        scale = small.shape[1] / width
+
+        # 背景色（最頻の明るさに近い中央値）から外れた画素を文字として抽出
+        background = int(np.median(small))
+        ink = (cv2.absdiff(small, np.full_like(small, background)) > self.ink_threshold).astype(np.uint8)
+        if not ink.any():
+            return None
+
+        # 文字・行・段落をつなげる
+        small_h, small_w = small.shape
+        kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (max(3, small_w // 30), max(3, small_h // 30)))
+        closed = cv2.morphologyEx(ink, cv2.MORPH_CLOSE, kernel)
+
+        contours, _ = cv2.findContours(closed, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        if not contours:
+            return None
+        boxes = [cv2.boundingRect(contour) for contour in contours]
+        largest = max(boxes, key=lambda box: box[2] * box[3])
+        x, y, w, h = None, None, None, None
+        for box in boxes:
+            if box[2] >= largest[2] * self.min_block_width:
+                x, y, w, h = _union((x, y, w, h) if x is not None else None, box)
+        if w * h < self.min_area_ratio * small_w * small_h:
+            return None
+
+        # 元画像の座標に戻して余白を追加
+        pad_x = int(width * self.padding)
+        pad_y = int(height * self.padding)
+        x1 = max(0, int(x / scale) - pad_x)
+        y1 = max(0, int(y / scale) - pad_y)
+        x2 = min(width, int((x + w) / scale) + pad_x)
+        y2 = min(height, int((y + h) / scale) + pad_y)
+        return (x1, y1, x2 - x1, y2 - y1)
+
+    def apply(self, image, generation=0):
+        """キャッシュした本文領域で画像を切り出す
+
+        generation: ウィンドウの状態を表す番号。変わった場合だけ領域を検出し直す。
+        """
+        size = image_size(image)
+        if self.generation is None or generation != self.generation or size != self.frame_size:
+            self._update(image, generation, size)
+        self._last_image = image
+
+        if self.region is None:
+            return image
+        return self._crop(image, self.region)
+
+    def observe(self):
+        """直近に切り出した画像（撮影するページ）の本文領域を検出し、次の expand() で反映する"""
+        image, self._last_image = self._last_image, None
+        if image is None:
+            return
+        region = self.detect(image)
+        if region:
+            self._observed = _union(self._observed, region)
+
+    def expand(self):
+        """observe() で見つかった本文が今の領域からはみ出していれば広げ、広げた場合は True を返す"""
+        if self._observed is None:
+            return False
+        # 領域が未検出（画面全体を使用中）の場合は、見つかった本文の範囲に切り替える
+        grown = _union(self.region, self._observed)
+        if grown == self.region:
+            return False
+        self.region = grown
+        x, y, w, h = grown
+        logger.info(f"本文領域を広げました: x={x}, y={y}, 幅={w}, 高さ={h}")
+        return True
+
+    def invalidate(self):
+        """キャッシュした領域を破棄"""
+        self.region = None
+        self.generation = None
+        self._observed = None
+        self._last_image = None
+
+    def _update(self, image, generation, size):
+        """本文領域を検出し直してキャッシュ"""
+        self.region = self.detect(image)
+        self._observed = self.region
+        self.generation = generation
+        self.frame_size = size
+        if self.region:
+            x, y, w, h = self.region
+            logger.info(f"本文領域を検出しました: x={x}, y={y}, 幅={w}, 高さ={h}"
+                        f"（画面の{w * h / (size[0] * size[1]) * 100:.0f}%）")
+        else:
+            logger.warning("本文領域を検出できませんでした。画面全体を使用します")
+
+    def _crop(self, image, region):
+        x, y, w, h = region
+        if isinstance(image, Image.Image):
+            return image.crop((x, y, x + w, y + h))
+        # スライスのままだと画面全体の配列を参照し続けるため、本文部分だけをコピーする
+        return np.asarray(image)[y:y + h, x:x + w].copy()
+
+    def _downscale(self, image):
+        """検出用の縮小グレースケール配列を作成"""
+        if isinstance(image, Image.Image):
+            # 全画面のまま変換すると遅いため、先に整数倍で縮小してからグレースケール化
+            factor = image.size[0] // self.detect_width
+            if factor > 1:
+                image = image.reduce(factor)
+            return to_gray_array(image)
+        array = to_gray_array(image)
+        factor = array.shape[1] // self.detect_width
+        if factor > 1:
+            array = cv2.resize(array, (array.shape[1] // factor, array.shape[0] // factor),
+                               interpolation=cv2.INTER_AREA)
+        return array
+
+
+def _union(region, other):
+    """2つの領域 (x, y, 幅, 高さ) を含む最小の領域（一方が None ならもう一方）"""
+    if region is None or other is None:
+        return region or other
+    x1 = min(region[0], other[0])
+    y1 = min(region[1], other[1])
+    x2 = max(region[0] + region[2], other[0] + other[2])
+    y2 = max(region[1] + region[3], other[1] + other[3])
+    return (x1, y1, x2 - x1, y2 - y1)
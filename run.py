@@ -10,13 +10,30 @@ import os
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from kindle_automation import KindleAutomation
+from checkpoint_journal import CheckpointJournal
+from google_drive_manager import GoogleDriveManager
 import time
 
+def run_preflight_check():
+    """Google Drive連携の事前確認を実行して結果を表示（全項目成功で True）"""
+    print("🔍 Google Drive連携の事前確認:")
+    try:
+        results = GoogleDriveManager().preflight_check()
+    except Exception as e:
+        results = [("事前確認", False, str(e))]
+    for item, ok, detail in results:
+        print(f"{'✅' if ok else '❌'} {item}: {detail}")
+    return all(ok for _, ok, _ in results)
+
 def main():
     print("🚀 Kindle自動テキスト抽出システム")
     print("=" * 40)
     print()
     
+    # 事前確認モード（python run.py --check）
+    if '--check' in sys.argv[1:]:
+        sys.exit(0 if run_preflight_check() else 1)
+    
     # 設定確認
     print("📋 設定確認:")
     automation = KindleAutomation()
@@ -79,6 +96,24 @@ def main():
         except ValueError:
             print("❌ 有効な数値を入力してください")
     
+    # 中断した実行の再開確認
+    resume = False
+    journal = CheckpointJournal(automation.config.OUTPUT_FOLDER)
+    if journal.can_resume:
+        print()
+        print(f"🔁 前回中断した記録があります（撮影済み: {len(journal.pages)}ページ）")
+        answer = input("前回の続きから再開しますか？ (Y/n): ").strip().lower()
+        resume = answer not in ['n', 'no', 'いいえ']
+        if resume:
+            print("📖 Kindleで最後に撮影したページを表示した状態にしてください")
+    
+    print()
+    
+    # 認証の問題は撮影開始前に検出する（Google APIクライアントはここで初めて読み込まれる）
+    if not run_preflight_check():
+        print("   python3 run.py --check で再確認できます")
+        return
+    
     print()
     print("⚠️  注意事項:")
     print("   • Kindleアプリが前面に表示されていることを確認してください")
@@ -107,7 +142,7 @@ def main():
     
     # 自動化実行
     try:
-        success = automation.run_full_automation(max_pages)
+        success = automation.run_full_automation(max_pages, resume=resume)
         
         if success:
             print()
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+画面取得（キャプチャ）のバックエンド
+
+    pyautogui: pyautogui.screenshot() で画面全体をPIL画像として取得（macOSでは毎回
+               screencapture を実行して一時ファイルを経由するため数百ミリ秒かかる）
+    mss:       mss で画面をメモリ上に直接取得し、BGRAのNumPy配列として返す（数ミリ秒）。
+               region を指定すると（Kindleウィンドウなど）その範囲だけを取得する
+
+使い方（取得時間の計測）:
+    python3 screen_capture.py [回数]
+"""
+
+import sys
+import time
+import logging
+import threading
+import importlib.util
+
+from lazy_import import lazy_import
+
+pyautogui = lazy_import('pyautogui')
+mss = lazy_import('mss')
+np = lazy_import('numpy')
+
+logger = logging.getLogger(__name__)
+
+CAPTURE_BACKENDS = ('pyautogui', 'mss')
+
+
+class CaptureBackend:
+    """画面取得の共通処理（取得回数と所要時間を集計する）"""
+
+    name = None
+
+    def __init__(self):
+        self.grab_count = 0
+        self.grab_seconds = 0.0
+
+    def grab(self):
+        """画面を1フレーム取得（PIL画像またはNumPy配列）"""
+        start = time.perf_counter()
+        image = self._grab()
+        self.grab_seconds += time.perf_counter() - start
+        self.grab_count += 1
+        return image
+
+    def _grab(self):
+        raise NotImplementedError
+
+    @property
+    def average_ms(self):
+        """1回あたりの平均取得時間（ミリ秒）"""
+        return self.grab_seconds / self.grab_count * 1000 if self.grab_count else 0.0
+
+    def set_region(self, region):
+        """取得範囲を変更（範囲を指定できない方式では何もしない）"""
+
+    def close(self):
+        pass
+
+
+class PyAutoGUICapture(CaptureBackend):
+    """pyautogui.screenshot() で画面全体を取得（従来の方式）
+
+    screen: screenshot() を持つもの（省略時は pyautogui、シミュレータに差し替え可能）
+    """
+
+    name = 'pyautogui'
+
+    def __init__(self, screen=None):
+        super().__init__()
+        self.screen = screen if screen is not None else pyautogui
+
+    def _grab(self):
+        return self.screen.screenshot()
+
+
+class MSSCapture(CaptureBackend):
+    """mss で画面を直接メモリに取得し、BGRAのNumPy配列で返す
+
+    region: 取得範囲 (x, y, 幅, 高さ)。省略時は monitor 番目のディスプレイ全体
+    mss のインスタンスはスレッドをまたいで使えないため、スレッドごとに作成する。
+    """
+
+    name = 'mss'
+
+    def __init__(self, region=None, monitor=1):
+        super().__init__()
+        self.region = tuple(region) if region else None
+        self.monitor = monitor
+        self._local = threading.local()
+        self._instances = []
+        self._lock = threading.Lock()
+
+    def set_region(self, region):
+        """取得範囲 (x, y, 幅, 高さ) を変更（ウィンドウが移動・リサイズされた場合）"""
+        region = tuple(region) if region else None
+        if region != self.region:
+            logger.info(f"画面取得の範囲を変更します: {region}")
+            self.region = region
+
+    def _get_mss(self):
+        instance = getattr(self._local, 'instance', None)
+        if instance is None:
+            instance = mss.mss()
+            self._local.instance = instance
+            with self._lock:
+                self._instances.append(instance)
+        return instance
+
+    def _grab(self):
+        instance = self._get_mss()
+        if self.region:
+            x, y, width, height = self.region
+            area = {'left': x, 'top': y, 'width': width, 'height': height}
+        else:
+            area = instance.monitors[self.monitor]
+        return np.asarray(instance.grab(area))
+
+    def close(self):
+        with self._lock:
+            for instance in self._instances:
+                instance.close()
+            self._instances.clear()
+        self._local = threading.local()
+
+
+def create_capture_backend(name='pyautogui', region=None, screen=None):
+    """設定名から画面取得バックエンドを作成（mss が未インストールの場合は pyautogui を使う）"""
+    if name == 'mss':
+        if importlib.util.find_spec('mss') is not None:
+            return MSSCapture(region=region)
+        logger.warning("mss が未インストールのため pyautogui で画面を取得します（pip install mss で高速化できます）")
+    elif name != 'pyautogui':
+        logger.warning(f"未対応の画面取得方式です: {name}（{', '.join(CAPTURE_BACKENDS)}）。pyautogui を使います")
+    return PyAutoGUICapture(screen)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    from config import Config
+    print(f"⏱️  画面取得時間（{count}回の平均）")
+    print("=" * 60)
+    for name, region in (('pyautogui', None), ('mss', None), ('mss', Config.KINDLE_WINDOW_BOUNDS)):
+        label = f"{name}（{'Kindleウィンドウ' if region else '画面全体'}）"
+        if name == 'mss' and importlib.util.find_spec('mss') is None:
+            print(f"{label:<28} ⏭️  mss が未インストールです")
+            continue
+        backend = create_capture_backend(name, region=region)
+        try:
+            image = backend.grab()
+            for _ in range(count - 1):
+                backend.grab()
+        except Exception as e:
+            print(f"{label:<28} ❌ {e}")
+            continue
+        finally:
+            backend.close()
+        size = image.shape[1::-1] if hasattr(image, 'shape') else image.size
+        print(f"{label:<28} {backend.average_ms:8.1f} ms  （{size[0]}x{size[1]}）")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+抽出済み書籍の全文検索インデックス（SQLite FTS5）
+
+使い方:
+    python3 search_index.py 検索語 [件数]   # 全書籍をページ単位で検索
+    python3 search_index.py --update        # output/ 以下の書籍をインデックスに反映
+"""
+
+import os
+import sys
+import time
+import logging
+import sqlite3
+import threading
+from dataclasses import dataclass
+
+from config import Config
+from text_writer import load_text_index
+
+logger = logging.getLogger(__name__)
+
+# trigram トークナイザは分かち書きのない日本語でも部分一致で引ける（SQLite 3.34以降）
+_TOKENIZERS = ("trigram", "unicode61")
+
+
+@dataclass
+class SearchHit:
+    """検索結果の1件（書籍・ページ・前後の抜粋）"""
+    book: str
+    page: int
+    image: str
+    snippet: str
+
+
+class LibrarySearchIndex:
+    """全書籍の抽出テキストをページ単位で登録する全文検索インデックス
+
+    書籍ごとに extracted_text.txt の更新時刻とサイズを記録し、
+    変わった書籍だけを入れ替えるので、書籍が増えても更新は差分だけで済む。
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS books (
+                book TEXT PRIMARY KEY,
+                text_path TEXT NOT NULL,
+                mtime REAL NOT NULL,
+                size INTEGER NOT NULL,
+                pages INTEGER NOT NULL,
+                indexed_at REAL NOT NULL
+            )
+        ''')
+        self.tokenizer = self._create_pages_table()
+        self._conn.commit()
+
+    def _create_pages_table(self):
+        """ページ単位の検索テーブルを作成し、使用するトークナイザ名を返す"""
+        row = self._conn.execute(
+            "SELECT sql FROM sqlite_master WHERE name = 'pages'").fetchone()
+        if row:
+            return next((name for name in _TOKENIZERS if name in row[0]), _TOKENIZERS[-1])
+        for tokenizer in _TOKENIZERS:
+            try:
+                self._conn.execute(f'''
+                    CREATE VIRTUAL TABLE pages USING fts5(
+                        book UNINDEXED, page UNINDEXED, image UNINDEXED, text,
+                        tokenize='{tokenizer}'
+                    )
+                ''')
+                return tokenizer
+            except sqlite3.OperationalError as e:
+                logger.warning(f"FTS5トークナイザ {tokenizer} が使えません: {e}")
+        raise RuntimeError("このSQLiteはFTS5に対応していません")
+
+    def index_book(self, book_folder, text_filename=Config.TEXT_OUTPUT_FILE, force=False):
+        """書籍フォルダの抽出テキストを登録（変更がなければ何もしない）し、登録したページ数を返す"""
+        book = os.path.basename(os.path.normpath(book_folder))
+        text_path = os.path.join(book_folder, text_filename)
+        if not os.path.exists(text_path):
+            return 0
+        stat = os.stat(text_path)
+
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT mtime, size FROM books WHERE book = ?', (book,)).fetchone()
+            if row and not force and row[0] == stat.st_mtime and row[1] == stat.st_size:
+                return 0
+
+            pages = list(self._read_pages(text_path))
+            with self._conn:
+                self._conn.execute('DELETE FROM pages WHERE book = ?', (book,))
+                self._conn.executemany(
+                    'INSERT INTO pages (book, page, image, text) VALUES (?, ?, ?, ?)',
+                    ((book, page, image, text) for page, image, text in pages if text))
+                self._conn.execute(
+                    'INSERT OR REPLACE INTO books (book, text_path, mtime, size, pages, indexed_at) '
+                    'VALUES (?, ?, ?, ?, ?, ?)',
+                    (book, text_path, stat.st_mtime, stat.st_size, len(pages), time.time()))
+        logger.info(f"検索インデックスに登録しました: {book}（{len(pages)}ページ）")
+        return len(pages)
+
+    def _read_pages(self, text_path):
+        """(ページ番号, 元画像, テキスト) を返す（ページ索引がなければファイル全体を1件として扱う）"""
+        with open(text_path, 'rb') as f:
+            data = f.read()
+        index_path = os.path.splitext(text_path)[0] + ".index.jsonl"
+        if not os.path.exists(index_path):
+            yield -1, None, data.decode('utf-8', errors='replace')
+            return
+        for page, entry in sorted(load_text_index(index_path).items()):
+            text = data[entry['offset']:entry['offset'] + entry['length']].decode('utf-8', errors='replace')
+            yield page, entry.get('image'), text
+
+    def update_library(self, library_folder="output"):
+        """ライブラリ内の全書籍を差分で反映し、(更新した書籍数, 削除した書籍数) を返す"""
+        updated = 0
+        present = set()
+        if os.path.isdir(library_folder):
+            for name in sorted(os.listdir(library_folder)):
+                book_folder = os.path.join(library_folder, name)
+                if not os.path.isdir(book_folder):
+                    continue
+                present.add(name)
+                try:
+                    if self.index_book(book_folder):
+                        updated += 1
+                except Exception as e:
+                    logger.error(f"検索インデックスへの登録に失敗 {name}: {e}")
+
+        # フォルダがなくなった書籍を削除
+        with self._lock:
+            removed = [book for (book,) in self._conn.execute('SELECT book FROM books')
+                       if book not in present]
+            with self._conn:
+                for book in removed:
+                    self._conn.execute('DELETE FROM pages WHERE book = ?', (book,))
+                    self._conn.execute('DELETE FROM books WHERE book = ?', (book,))
+        return updated, len(removed)
+
+    def search(self, query, limit=20):
+        """全書籍をページ単位で検索し、関連度順の SearchHit リストを返す"""
+        query = query.strip()
+        if not query:
+            return []
+        with self._lock:
+            if self.tokenizer == 'trigram' and len(query) < 3:
+                # trigram は3文字未満を索引で引けない（LIKEも結果を返さない）ため、全件を部分一致で探す
+                rows = self._conn.execute(
+                    'SELECT book, page, image, text FROM pages WHERE instr(text, ?) > 0 LIMIT ?',
+                    (query, limit)).fetchall()
+                return [SearchHit(book, page, image, _make_snippet(text, query))
+                        for book, page, image, text in rows]
+            phrase = '"' + query.replace('"', '""') + '"'
+            rows = self._conn.execute(
+                "SELECT book, page, image, snippet(pages, 3, '[', ']', '…', 16) "
+                'FROM pages WHERE pages MATCH ? ORDER BY rank LIMIT ?',
+                (phrase, limit)).fetchall()
+        return [SearchHit(book, page, image, snippet.replace('\n', ' '))
+                for book, page, image, snippet in rows]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def _make_snippet(text, query, width=24):
+    """部分一致した位置の前後を抜き出す"""
+    position = text.find(query)
+    start = max(0, position - width)
+    end = min(len(text), position + len(query) + width)
+    snippet = text[start:position] + f"[{query}]" + text[position + len(query):end]
+    return ('…' if start > 0 else '') + snippet.replace('\n', ' ') + ('…' if end < len(text) else '')
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    args = sys.argv[1:]
+    if not args:
+        print(__doc__)
+        return
+
+    index = LibrarySearchIndex(Config.SEARCH_INDEX_PATH)
+    try:
+        if args[0] == '--update':
+            updated, removed = index.update_library()
+            print(f"📚 更新: {updated}冊, 削除: {removed}冊")
+            return
+
+        # 検索前に新しく完了した書籍を反映（変更のない書籍は読み込まない）
+        index.update_library()
+        limit = int(args[1]) if len(args) > 1 else 20
+        start = time.perf_counter()
+        hits = index.search(args[0], limit=limit)
+        elapsed = (time.perf_counter() - start) * 1000
+        for hit in hits:
+            page = f"{hit.page + 1}ページ" if hit.page >= 0 else "ページ不明"
+            print(f"📖 {hit.book} / {page}: {hit.snippet}")
+        print(f"🔍 {len(hits)}件（{elapsed:.1f}ms）")
+    finally:
+        index.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def merge_page_pdfs(page_pdf_paths, output_path):
+    """ページごとの検索可能PDFを1冊のPDFに結合し、出力パスを返す
+
+    OCR（画像の認識とPDFの生成）はページごとに撮影と並行して済んでおり、ここでは結合だけを行う。
+    ただし結合は書籍の最後に1回で行い、pypdf は書き出すまで全ページのオブジェクトを保持するため、
+    メモリ使用量はページPDFの合計サイズ（圧縮済みの画像とテキスト層）程度になる。
+    pypdf は requirements.txt に含まれる（未インストールの場合はページ単位のPDFのまま残して None を返す）。
+    """
+    try:
+        from pypdf import PdfWriter
+    except ImportError:
+        logger.error("pypdf が未インストールのため、検索可能PDFはページ単位のまま残します"
+                     "（pip install -r requirements.txt で1冊に結合できます）")
+        return None
+
+    existing = [path for path in page_pdf_paths if os.path.exists(path)]
+    missing = len(page_pdf_paths) - len(existing)
+    if missing:
+        logger.warning(f"検索可能PDFが作成されていないページが{missing}ページあります")
+    if not existing:
+        return None
+
+    try:
+        writer = PdfWriter()
+        for path in existing:
+            writer.append(path)
+        temp_path = output_path + ".tmp"
+        with open(temp_path, 'wb') as f:
+            writer.write(f)
+        writer.close()
+        os.replace(temp_path, output_path)
+        logger.info(f"検索可能PDFを作成しました: {output_path}（{len(existing)}ページ）")
+        return output_path
+    except Exception as e:
+        logger.error(f"検索可能PDFの結合に失敗: {e}")
+        return None
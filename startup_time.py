@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+起動時間の計測スクリプト
+モジュールごとの読み込み時間を新しいPythonプロセスで計測して表示します
+
+使い方:
+    python3 startup_time.py            # 既定のモジュールを計測
+    python3 startup_time.py cv2 run    # 指定したモジュールだけ計測
+"""
+
+import os
+import sys
+import subprocess
+
+# プロジェクトのエントリポイントと、読み込みの重い依存ライブラリ
+DEFAULT_MODULES = [
+    'run',
+    'kindle_automation',
+    'google_drive_manager',
+    'config',
+    'numpy',
+    'PIL.Image',
+    'cv2',
+    'pytesseract',
+    'pyautogui',
+    'mss',
+    'googleapiclient.discovery',
+    'google_auth_oauthlib.flow',
+]
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def measure_import(module, top=5):
+    """新しいプロセスで module を読み込み、(合計ミリ秒, 自身の時間が大きい順の内訳) を返す
+
+    -X importtime の出力を解析する。読み込めなかった場合は (None, エラーメッセージ)。
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        capture_output=True, text=True, cwd=PROJECT_DIR)
+    if result.returncode != 0:
+        error = result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "不明なエラー"
+        return None, error
+
+    entries = []
+    total = None
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        name = name.strip()
+        entries.append((int(self_us) / 1000, name))
+        if name == module:
+            total = int(cumulative_us) / 1000
+    entries.sort(reverse=True)
+    return total, entries[:top]
+
+
+def main():
+    modules = sys.argv[1:] or DEFAULT_MODULES
+    print("⏱️  モジュール読み込み時間（新しいプロセスで計測）")
+    print("=" * 60)
+    for module in modules:
+        total, detail = measure_import(module)
+        if total is None:
+            print(f"{module:<28} ❌ {detail}")
+            continue
+        breakdown = ", ".join(f"{name} {ms:.0f}ms" for ms, name in detail)
+        print(f"{module:<28} {total:8.1f} ms  （内訳上位: {breakdown}）")
+    print()
+    print("run / kindle_automation が数十ミリ秒程度であれば、重いライブラリは遅延読み込みされています")
+
+
+if __name__ == "__main__":
+    main()
@@ -103,6 +103,295 @@ def test_ocr():
     print()
 
 
+def test_page_diff():
+    """ページ比較エンジンのテスト（画面操作なし）"""
+    print("=== ページ比較テスト ===")
+    from PIL import Image, ImageDraw
+    from page_diff import PageDiffEngine
+    
+    engine = PageDiffEngine()
+    page1 = Image.new('RGB', (1920, 1080), 'white')
+    page2 = page1.copy()
+    ImageDraw.Draw(page2).rectangle((600, 300, 1300, 800), fill='black')
+    
+    same = engine.compare(page1, page1.copy())
+    changed = engine.compare(page1, page2)
+    print(f"同一ページ: 類似度={same.similarity:.3f}, 判定={same.is_same}")
+    print(f"別ページ: 類似度={changed.similarity:.3f}, 判定={changed.is_same}, 変化領域={changed.bbox}")
+    if same.is_same and not changed.is_same:
+        print("✅ ページ比較: 正常")
+    else:
+        print("❌ ページ比較: 判定が期待と異なります")
+    print()
+
+def test_simulated_capture():
+    """Kindleシミュレータで撮影ループを通しで実行するテスト（画面操作なし・macOS不要）"""
+    print("=== 撮影ループテスト（シミュレータ） ===")
+    import time
+    import shutil
+    import tempfile
+    from kindle_simulator import SimulatedKindle, attach_simulator
+    
+    kindle = SimulatedKindle(total_pages=12, render_latency=0.2, drop_rate=0.1)
+    automation = KindleAutomation()
+    work_dir = tempfile.mkdtemp(prefix="kindle_test_")
+    try:
+        automation.config.OUTPUT_FOLDER = work_dir
+        automation.setup_directories()
+        attach_simulator(automation, kindle)
+        
+        start = time.perf_counter()
+        screenshots = automation.capture_all_pages(total_pages=kindle.total_pages)
+        elapsed = time.perf_counter() - start
+        print(f"撮影: {len(screenshots)}/{kindle.total_pages}ページ, {elapsed:.1f}秒, "
+              f"キー入力の取りこぼし: {kindle.dropped_keys}回")
+        if len(screenshots) == kindle.total_pages and all(os.path.exists(path) for path in screenshots):
+            print("✅ 撮影ループ: 正常")
+        else:
+            print("❌ 撮影ループ: 撮影枚数が期待と異なります")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    print()
+
+def test_page_region():
+    """本文領域のテスト（章の始まりのページ＝本文が下半分だけのページから撮影を始める）"""
+    print("=== 本文領域テスト（シミュレータ） ===")
+    import shutil
+    import tempfile
+    import numpy as np
+    from PIL import Image
+    from kindle_simulator import SimulatedKindle, attach_simulator
+    
+    def dark_pixels(image):
+        return int((np.asarray(image.convert('L')) < 100).sum())
+    
+    for probe in (True, False):
+        kindle = SimulatedKindle(total_pages=6, render_latency=0.05, chapter_pages=(0,))
+        automation = KindleAutomation()
+        work_dir = tempfile.mkdtemp(prefix="kindle_test_")
+        try:
+            automation.config.OUTPUT_FOLDER = work_dir
+            automation.setup_directories()
+            attach_simulator(automation, kindle)
+            if not probe:
+                # 方向判定を省くと1ページ目だけで最初の領域が決まり、2ページ目で広がる
+                automation.determine_page_direction = lambda: 'right'
+            screenshots = automation.capture_all_pages(total_pages=kindle.total_pages)
+            pages = [Image.open(path) for path in screenshots]
+            # 切り抜きで欠けた文字がないか（保存した画像と元のページの黒い画素数を比べる）
+            cut = [i for i, page in enumerate(pages) if dark_pixels(page) != dark_pixels(kindle.render_page(i))]
+            label = "方向判定あり" if probe else "方向判定なし"
+            print(f"{label}: {[page.size for page in pages]}, 欠けたページ: {cut}")
+            # 領域は広がるだけなので、最初のページの小さい領域に固定されていないかを高さで見る
+            full_height = pages[-1].size[1]
+            locked = [i for i, page in enumerate(pages[0 if probe else 1:]) if page.size[1] < full_height * 0.9]
+            if len(pages) == kindle.total_pages and not cut and not locked:
+                print(f"✅ 本文領域（{label}）: 正常")
+            else:
+                print(f"❌ 本文領域（{label}）: 本文が切り取られているか、ページの大きさが揃っていません")
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+    print()
+
+def test_page_archive():
+    """ページアーカイブの再開テスト（異常終了で途切れたアーカイブを作り直す）"""
+    print("=== ページアーカイブテスト ===")
+    import json
+    import shutil
+    import tempfile
+    from PIL import Image
+    from page_archive import PageArchive, read_page
+    
+    work_dir = tempfile.mkdtemp(prefix="kindle_test_")
+    try:
+        pages = []
+        for i in range(3):
+            path = os.path.join(work_dir, f"page_{i:04d}.png")
+            Image.new('RGB', (200, 300), (i * 60, 255, 255)).save(path)
+            pages.append(path)
+        archive_path = os.path.join(work_dir, "pages.cbz")
+        
+        # 中央ディレクトリを書く前に異常終了した状態を作る
+        archive = PageArchive(archive_path)
+        for path in pages[:2]:
+            archive.add(path)
+        archive._zip.fp.flush()
+        with open(archive_path, 'rb') as f:
+            crashed = f.read()
+        archive.close()
+        with open(archive_path, 'wb') as f:
+            f.write(crashed)
+        
+        # 再開時は作り直して撮影済みページを追加し直す
+        archive = PageArchive(archive_path)
+        for path in pages:
+            archive.add(path)
+        count = archive.close()
+        with open(pages[2], 'rb') as f:
+            expected = f.read()
+        with open(archive.index_path, 'r', encoding='utf-8') as f:
+            entry = json.load(f)['pages'][2]
+        stored_size = sum(os.path.getsize(path) for path in pages)
+        print(f"途切れたアーカイブ: {len(crashed)}バイト → 再作成後: {os.path.getsize(archive_path)}バイト, {count}ページ")
+        if (count == 3 and read_page(archive_path, entry) == expected
+                and os.path.getsize(archive_path) < stored_size + len(crashed)):
+            print("✅ ページアーカイブ: 正常")
+        else:
+            print("❌ ページアーカイブ: 途切れたアーカイブが作り直されていません")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    print()
+
+def test_ocr_cache():
+    """OCR結果キャッシュのテスト（上限を超えたら参照の古いものから削除する）"""
+    print("=== OCRキャッシュテスト ===")
+    import time
+    import shutil
+    import tempfile
+    from ocr_cache import OCRCache
+    
+    work_dir = tempfile.mkdtemp(prefix="kindle_test_")
+    try:
+        cache = OCRCache(os.path.join(work_dir, "cache", "ocr_cache.sqlite3"), max_bytes=250)
+        cache.put("a", "あ" * 33 + "a")  # 100バイト
+        time.sleep(0.01)
+        cache.put("b", "b" * 100)
+        time.sleep(0.01)
+        cache.get("a")  # a を最近参照したことにする
+        time.sleep(0.01)
+        cache.put("c", "c" * 100)  # 上限を超えるので b が削除される
+        remaining = [key for key in ("a", "b", "c") if cache.get(key) is not None]
+        cache.close()
+    
+        # 閉じて開き直しても残っている
+        reopened = OCRCache(cache.db_path, max_bytes=250)
+        persisted = reopened.get("c") == "c" * 100
+        reopened.close()
+        print(f"残ったキー: {remaining}, 開き直し後: {'あり' if persisted else 'なし'}")
+        if remaining == ["a", "c"] and persisted:
+            print("✅ OCRキャッシュ: 正常")
+        else:
+            print("❌ OCRキャッシュ: 削除または永続化が期待と異なります")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    print()
+
+def test_checkpoint_journal():
+    """チェックポイントジャーナルの再開テスト（未作成のフォルダ・書き込み途中の行を含む）"""
+    print("=== チェックポイントジャーナルテスト ===")
+    import shutil
+    import tempfile
+    from checkpoint_journal import CheckpointJournal
+    from kindle_simulator import SimulatedKindle, attach_simulator
+    
+    work_dir = tempfile.mkdtemp(prefix="kindle_test_")
+    try:
+        book_folder = os.path.join(work_dir, "新しい書籍")  # まだ存在しないフォルダ
+        journal = CheckpointJournal(book_folder)
+        journal.start_run()
+        journal.record_direction('left')
+        for i in range(3):
+            journal.record_capture(i, f"page_{i:04d}.png", 0xabc + i)
+        journal.record_ocr("page_0000.png")
+        journal.record_upload("page_0000.png", "file-0")
+        # 書き込み途中で異常終了した最終行
+        with open(journal.path, 'a', encoding='utf-8') as f:
+            f.write('{"event": "capture", "page": 3, "fi')
+    
+        resumed = CheckpointJournal(book_folder)
+        resumed.start_run(resume=True)
+        resumed.record_capture(3, "page_0003.png")
+        reopened = CheckpointJournal(book_folder)
+        print(f"再開可能: {resumed.can_resume}, 次のページ: {reopened.next_page_index()}, "
+              f"撮影済み: {len(reopened.pages)}ページ, 方向: {reopened.direction}")
+        if (resumed.can_resume and reopened.next_page_index() == 4
+                and reopened.captured_files()[-1] == "page_0003.png"
+                and reopened.is_ocr_done("page_0000.png") and reopened.is_uploaded("page_0000.png")
+                and not reopened.is_ocr_done("page_0001.png") and reopened.direction == 'left'):
+            print("✅ チェックポイントジャーナル: 正常")
+        else:
+            print("❌ チェックポイントジャーナル: 再開時の状態が期待と異なります")
+        
+        # 保存に失敗したページ（2）が欠けた状態から撮影を再開しても番号が重ならない
+        gap_folder = os.path.join(work_dir, "欠番のある書籍")
+        journal = CheckpointJournal(gap_folder)
+        journal.start_run()
+        journal.record_direction('right')
+        for i in (0, 1, 3):
+            journal.record_capture(i, f"page_{i:04d}.png", i)
+        automation = KindleAutomation()
+        automation.config.OUTPUT_FOLDER = gap_folder
+        automation.setup_directories()
+        attach_simulator(automation, SimulatedKindle(total_pages=20, render_latency=0.05))
+        automation.journal = journal
+        automation.capture_all_pages(max_pages=6)
+        indexes = [journal.pages[name]['index'] for name in journal.captured_files()]
+        print(f"再開後のページ番号: {indexes}")
+        if indexes == [0, 1, 3, 4, 5] and journal.captured_files()[-1] == "page_0005.png":
+            print("✅ 撮影の再開: 正常")
+        else:
+            print("❌ 撮影の再開: ページ番号が重なっています")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    print()
+
+def test_text_writer():
+    """テキストの逐次書き出しテスト（順不同の到着・欠番・ページ索引・キャッシュ済みページの通知順）"""
+    print("=== テキスト書き出しテスト ===")
+    import shutil
+    import tempfile
+    from PIL import Image
+    from ocr_cache import OCRCache
+    from ocr_engine import OCRResult, ParallelOCR
+    from text_writer import StreamingTextWriter, load_text_index, read_page_text
+    
+    work_dir = tempfile.mkdtemp(prefix="kindle_test_")
+    try:
+        writer = StreamingTextWriter(os.path.join(work_dir, "extracted_text.txt"))
+        texts = {i: f"{i + 1}ページ目の本文" for i in range(8)}
+        for i in (2, 0, 1, 5, 4):
+            writer.add(OCRResult(index=i, image_path=f"page_{i:04d}.png", text=texts[i]))
+        waiting = len(writer._pending)  # 3ページ目（index 3）の結果待ち
+        writer.skip(3)  # 画像の保存に失敗したページ
+        waiting_after_skip = len(writer._pending)
+        for i in (7, 6):
+            writer.add(OCRResult(index=i, image_path=f"page_{i:04d}.png", text=texts[i]))
+        writer.close()
+        
+        index = load_text_index(writer.index_path)
+        restored = {page: read_page_text(writer.text_path, entry) for page, entry in index.items()}
+        with open(writer.text_path, 'r', encoding='utf-8') as f:
+            in_order = f.read().split('\n\n') == [texts[i] for i in sorted(restored)]
+        print(f"索引: {sorted(index)}, 欠番: {writer.skipped_count}ページ, "
+              f"順番待ち: {waiting} → 欠番の通知後 {waiting_after_skip}ページ")
+        expected = {i: texts[i] for i in texts if i != 3}
+        if restored == expected and in_order and waiting == 2 and waiting_after_skip == 0:
+            print("✅ テキスト書き出し: 正常")
+        else:
+            print("❌ テキスト書き出し: 索引または本文が期待と異なります")
+        
+        # 先頭ページだけキャッシュがない場合も、キャッシュ済みのページを先に通知しない
+        paths = []
+        for i in range(5):
+            path = os.path.join(work_dir, f"page_{i:04d}.png")
+            Image.new('RGB', (40, 40), (i * 40, 255, 255)).save(path)
+            paths.append(path)
+        cache = OCRCache(os.path.join(work_dir, "ocr_cache.sqlite3"))
+        ocr = ParallelOCR(Config.OCR_LANGUAGE, Config.TESSERACT_PATH, workers=1, cache=cache)
+        for i, path in enumerate(paths[1:], 1):
+            cache.put(cache.make_key(path, ocr.lang, ocr.cache_options), texts[i])
+        os.remove(paths[0])  # OCRに失敗させる（Tesseractがなくても順番だけを確認できる）
+        order = []
+        ocr.run(paths, progress_callback=lambda result: order.append(result.index), keep_text=False)
+        cache.close()
+        print(f"通知順: {order}")
+        if order == list(range(5)):
+            print("✅ OCR結果の通知順: 正常")
+        else:
+            print("❌ OCR結果の通知順: ページ順になっていません")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    print()
 
 def test_google_drive():
     """Google Drive連携のテスト"""
@@ -160,6 +449,13 @@ def main():
     test_dependencies()
     test_screenshot()
     test_ocr()
+    test_page_diff()
+    test_simulated_capture()
+    test_page_region()
+    test_page_archive()
+    test_ocr_cache()
+    test_checkpoint_journal()
+    test_text_writer()
     test_google_drive()
     test_kindle_automation()
     
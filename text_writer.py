@@ -0,0 +1,128 @@
+import os
+import json
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# ページ間の区切り（従来の extracted_text.txt と同じ）
+PAGE_SEPARATOR = '\n\n'.encode('utf-8')
+
+
+class StreamingTextWriter:
+    """OCR結果をページ順にテキストファイルへ逐次追記し、ページ索引を書き出す
+
+    OCRは並列に進むため結果の到着順はばらばらになる。次に書くべきページより先に
+    届いた結果だけを一時的に保持し、順番が来たものから書き出す。
+    画像の保存に失敗したページなど結果が届かないページは skip() で欠番にする
+    （通知がないと以降の全ページが順番待ちのままメモリに溜まり続ける）。
+    索引（JSON Lines）にはページごとのバイト位置・長さ・元画像を1行ずつ追記するので、
+    途中で異常終了してもそこまでのページは読み出せ、ファイル全体を読まずに任意のページを取り出せる。
+    """
+
+    def __init__(self, text_path, index_path=None, first_index=0):
+        self.text_path = text_path
+        self.index_path = index_path or os.path.splitext(text_path)[0] + ".index.jsonl"
+        self._next_index = first_index
+        self._pending = {}  # 順番待ちの結果（ページ番号 -> OCRResult）
+        self._skipped = set()  # 欠番として通知されたページ番号
+        self._lock = threading.Lock()
+        self._offset = 0
+        self._has_text = False
+        self.page_count = 0
+        self.failed_count = 0
+        self.skipped_count = 0
+
+        self._text_file = open(text_path, 'wb')
+        self._index_file = open(self.index_path, 'w', encoding='utf-8')
+
+    def add(self, result):
+        """1ページ分のOCR結果を渡す（どのスレッドからでも、どの順番でも可）"""
+        with self._lock:
+            if result.index < self._next_index:
+                # 欠番にした後で届いた結果は、順番が前後しても捨てずに書き出す
+                logger.warning(f"ページ {result.index + 1} のOCR結果が遅れて届いたため末尾に書き出します")
+                self._write(result)
+                return
+            self._pending[result.index] = result
+            self._flush()
+
+    def skip(self, index):
+        """結果が届かないページ（画像の保存に失敗したページなど）を欠番にする"""
+        with self._lock:
+            if index < self._next_index or index in self._pending:
+                return
+            self._skipped.add(index)
+            self._flush()
+
+    def close(self):
+        """順番待ちの結果をページ順に書き出してファイルを閉じる（欠番があっても残りを書く）"""
+        with self._lock:
+            for index in sorted(self._pending):
+                self._write(self._pending.pop(index))
+            self._text_file.close()
+            self._index_file.close()
+        if self.failed_count:
+            logger.warning(f"OCRに失敗したページ: {self.failed_count}/{self.page_count}ページ")
+        if self.skipped_count:
+            logger.warning(f"テキストが欠番のページ: {self.skipped_count}ページ")
+        logger.info(f"テキスト抽出完了: {self.text_path}（{self.page_count}ページ）")
+
+    def _flush(self):
+        """順番が来た結果を書き出す（欠番のページは飛ばす）"""
+        while True:
+            if self._next_index in self._pending:
+                self._write(self._pending.pop(self._next_index))
+            elif self._next_index in self._skipped:
+                self._skipped.discard(self._next_index)
+                self.skipped_count += 1
+            else:
+                break
+            self._next_index += 1
+
+    def _write(self, result):
+        self.page_count += 1
+        if not result.ok:
+            self.failed_count += 1
+        data = result.text.encode('utf-8') if result.text else b''
+        if data:
+            # 空のページは区切りも入れない（従来の出力と同じ）
+            if self._has_text:
+                self._text_file.write(PAGE_SEPARATOR)
+                self._offset += len(PAGE_SEPARATOR)
+            self._text_file.write(data)
+            self._has_text = True
+        entry = {
+            'page': result.index,
+            'offset': self._offset,
+            'length': len(data),
+            'image': os.path.basename(result.image_path),
+        }
+        self._offset += len(data)
+        self._text_file.flush()
+        self._index_file.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        self._index_file.flush()
+
+
+def load_text_index(index_path):
+    """ページ索引を読み込み、ページ番号 -> 索引項目 の辞書を返す"""
+    index = {}
+    with open(index_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                # 書き込み途中で途切れた最終行
+                continue
+            index[entry['page']] = entry
+    return index
+
+
+def read_page_text(text_path, entry):
+    """索引の1項目を使って1ページ分のテキストだけを読み出す"""
+    with open(text_path, 'rb') as f:
+        f.seek(entry['offset'])
+        return f.read(entry['length']).decode('utf-8')
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+撮影スループットの計測スクリプト
+Kindleシミュレータ（kindle_simulator.py）を使い、macOSや実機のKindleなしで
+撮影ループと全体処理（撮影・OCR・アップロード）の1分あたりページ数を計測します
+
+使い方:
+    python3 throughput_benchmark.py                          # 撮影ループと全体処理を計測
+    python3 throughput_benchmark.py --pages 100 --latency 0.5 --drop 0.05
+    python3 throughput_benchmark.py --capture-only           # 撮影ループのみ（Tesseract不要）
+    python3 throughput_benchmark.py --detect-end             # 総ページ数を渡さず書籍の終了検出も含める
+"""
+
+import os
+import sys
+import time
+import shutil
+import logging
+import argparse
+import tempfile
+
+# プロジェクトのルートディレクトリをPythonパスに追加
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from kindle_automation import KindleAutomation
+from kindle_simulator import SimulatedKindle, SimulatedDriveManager, attach_simulator
+from text_writer import load_text_index
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Kindleシミュレータで撮影スループットを計測")
+    parser.add_argument('--pages', type=int, default=30, help="書籍のページ数（既定: 30）")
+    parser.add_argument('--latency', type=float, default=0.3, help="ページの描画にかかる秒数（既定: 0.3）")
+    parser.add_argument('--drop', type=float, default=0.0, help="キー入力を取りこぼす確率（既定: 0）")
+    parser.add_argument('--upload-latency', type=float, default=0.0, help="1ファイルのアップロード秒数（既定: 0）")
+    parser.add_argument('--size', default="1280x800", help="画面サイズ（既定: 1280x800）")
+    parser.add_argument('--capture-only', action='store_true', help="撮影ループだけを計測")
+    parser.add_argument('--detect-end', action='store_true', help="総ページ数を渡さず書籍の終了を検出させる")
+    parser.add_argument('--keep', action='store_true', help="出力フォルダを削除せずに残す")
+    parser.add_argument('--verbose', action='store_true', help="処理中のログを表示")
+    return parser.parse_args()
+
+
+def create_simulated_automation(args, work_dir, name):
+    """作業フォルダに出力するシミュレータ付きの KindleAutomation を作成"""
+    width, height = (int(value) for value in args.size.lower().split('x'))
+    kindle = SimulatedKindle(total_pages=args.pages, size=(width, height),
+                             render_latency=args.latency, drop_rate=args.drop)
+    drive_manager = SimulatedDriveManager(upload_latency=args.upload_latency)
+
+    automation = KindleAutomation()
+    config = automation.config
+    config.set_book_title(name)
+    config.OUTPUT_FOLDER = os.path.join(work_dir, name)
+    # 共有のキャッシュ・検索インデックスを使うと2回目以降のOCRが計測にならないため作業フォルダに置く
+    config.OCR_CACHE_PATH = os.path.join(work_dir, ".ocr_cache.sqlite3")
+    config.SEARCH_INDEX_PATH = os.path.join(work_dir, ".search_index.sqlite3")
+    automation.setup_directories()
+    attach_simulator(automation, kindle, drive_manager, report_total_pages=not args.detect_end)
+    return automation, kindle, drive_manager
+
+
+def pages_per_minute(pages, seconds):
+    return pages / seconds * 60 if seconds > 0 else 0.0
+
+
+def benchmark_capture(args, work_dir):
+    """撮影ループ（capture_all_pages）だけを計測"""
+    automation, kindle, _ = create_simulated_automation(args, work_dir, "capture")
+    total_pages = None if args.detect_end else kindle.total_pages
+
+    start = time.perf_counter()
+    screenshots = automation.capture_all_pages(total_pages=total_pages)
+    elapsed = time.perf_counter() - start
+
+    print_result("撮影ループ", len(screenshots), elapsed, kindle)
+    return len(screenshots) == kindle.total_pages
+
+
+def benchmark_full(args, work_dir):
+    """撮影・OCR・アップロードを含む全体処理（run_full_automation）を計測"""
+    automation, kindle, drive_manager = create_simulated_automation(args, work_dir, "full")
+    tesseract = shutil.which('tesseract') or automation.config.TESSERACT_PATH
+    if not os.path.exists(tesseract):
+        print("⏭️  全体処理: Tesseractが見つからないためスキップしました")
+        return True
+    automation.config.TESSERACT_PATH = tesseract
+
+    start = time.perf_counter()
+    success = automation.run_full_automation()
+    elapsed = time.perf_counter() - start
+
+    text_path = automation.config.get_text_output_path()
+    index_path = os.path.splitext(text_path)[0] + ".index.jsonl"
+    text_pages = len(load_text_index(index_path)) if os.path.exists(index_path) else 0
+    captured = len(automation.journal.pages) if automation.journal else 0
+    print_result("全体処理", captured, elapsed, kindle)
+    print(f"   OCR済み: {text_pages}ページ, アップロード: {len(drive_manager.uploaded)}ファイル")
+    return success and captured == kindle.total_pages and text_pages == captured
+
+
+def print_result(label, pages, elapsed, kindle):
+    ok = pages == kindle.total_pages
+    print(f"{'✅' if ok else '❌'} {label}: {pages}/{kindle.total_pages}ページ, {elapsed:.1f}秒, "
+          f"{pages_per_minute(pages, elapsed):.1f}ページ/分")
+    print(f"   画面取得: {kindle.screenshot_count}回（{kindle.screenshot_count / max(pages, 1):.1f}回/ページ）, "
+          f"キー入力: {kindle.key_presses}回（取りこぼし{kindle.dropped_keys}回）")
+
+
+def main():
+    args = parse_args()
+    logging.getLogger().setLevel(logging.INFO if args.verbose else logging.WARNING)
+
+    print("⏱️  撮影スループット（Kindleシミュレータ）")
+    print(f"   {args.pages}ページ, 描画{args.latency}秒, 取りこぼし率{args.drop}, 画面{args.size}")
+    print("=" * 60)
+
+    work_dir = tempfile.mkdtemp(prefix="kindle_benchmark_")
+    try:
+        ok = benchmark_capture(args, work_dir)
+        if not args.capture_only:
+            ok = benchmark_full(args, work_dir) and ok
+    finally:
+        if args.keep:
+            print(f"📁 出力フォルダ: {work_dir}")
+        else:
+            shutil.rmtree(work_dir, ignore_errors=True)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+import time
+import logging
+import subprocess
+
+logger = logging.getLogger(__name__)
+
+# 最前面アプリ名とKindleウィンドウの位置・サイズを1回のosascriptで取得する
+_FOCUS_STATE_SCRIPT = '''
+tell application "System Events"
+    set frontApp to name of first application process whose frontmost is true
+    set winInfo to ""
+    if exists process "{app}" then
+        tell process "{app}"
+            if (count of windows) > 0 then
+                set {{x, y}} to position of window 1
+                set {{w, h}} to size of window 1
+                set winInfo to (x as text) & "," & (y as text) & "," & (w as text) & "," & (h as text)
+            end if
+        end tell
+    end if
+    return frontApp & "|" & winInfo
+end tell
+'''
+
+_ACTIVATE_SCRIPT = '''
+tell application "{app}"
+    activate
+    delay 0.5
+    tell application "System Events"
+        tell process "{app}"
+            set frontmost to true
+        end tell
+    end tell
+end tell
+'''
+
+_RESIZE_SCRIPT = '''
+tell application "System Events"
+    tell process "{app}"
+        set position of window 1 to {{{x}, {y}}}
+        set size of window 1 to {{{w}, {h}}}
+    end tell
+end tell
+'''
+
+
+class KindleWindowFocus:
+    """Kindleウィンドウのフォーカス状態を管理する
+
+    最前面かどうかとウィンドウ位置を1回のosascriptで確認し、結果を
+    check_interval 秒キャッシュする。フォーカスを失った場合だけ再アクティブ化し、
+    ウィンドウがずれた場合だけリサイズする。
+    """
+
+    def __init__(self, app_name="Amazon Kindle", window_bounds=(0, 0, 1920, 1080),
+                 check_interval=2.0, activation_delay=1.5, resize_delay=0.5):
+        self.app_name = app_name
+        self.window_bounds = tuple(window_bounds)
+        self.check_interval = check_interval
+        self.activation_delay = activation_delay
+        self.resize_delay = resize_delay
+
+        self._focused = False
+        self._last_check = 0.0
+        self.activation_count = 0
+        # ウィンドウの実際の位置・サイズが変わるたびに増える（画面領域の再検出に使用）
+        self.window_generation = 0
+        # リサイズ後に読み戻した実際の位置・サイズ（macOSはメニューバーの下に収めるため指定値と一致しない）
+        self.actual_bounds = None
+
+    def _run_script(self, script):
+        """AppleScriptを実行して標準出力を返す"""
+        result = subprocess.run(['osascript', '-e', script], capture_output=True, text=True)
+        return result.stdout.strip()
+
+    def get_state(self):
+        """(最前面かどうか, ウィンドウの位置とサイズ) を取得"""
+        output = self._run_script(_FOCUS_STATE_SCRIPT.format(app=self.app_name))
+        front_app, _, window_info = output.partition('|')
+        bounds = None
+        if window_info:
+            try:
+                bounds = tuple(int(float(v)) for v in window_info.split(','))
+            except ValueError:
+                bounds = None
+        return front_app == self.app_name, bounds
+
+    def activate(self):
+        """Kindleを最前面にしてウィンドウを既定の位置・サイズにする"""
+        try:
+            self._run_script(_ACTIVATE_SCRIPT.format(app=self.app_name))
+            time.sleep(self.activation_delay)
+            self.resize()
+            self.activation_count += 1
+            self._mark_focused()
+            return True
+        except Exception as e:
+            logger.error(f"Kindleアプリのアクティブ化に失敗: {e}")
+            self.invalidate()
+            return False
+
+    def resize(self):
+        """ウィンドウを既定の位置・サイズに合わせ、実際に収まった位置・サイズを記録する"""
+        x, y, w, h = self.window_bounds
+        self._run_script(_RESIZE_SCRIPT.format(app=self.app_name, x=x, y=y, w=w, h=h))
+        time.sleep(self.resize_delay)
+        try:
+            _, bounds = self.get_state()
+        except Exception as e:
+            logger.warning(f"リサイズ後のウィンドウ位置・サイズを取得できませんでした: {e}")
+            bounds = None
+        self._update_bounds(bounds)
+
+    def _update_bounds(self, bounds):
+        """実際の位置・サイズを基準として記録し、変わった場合だけ window_generation を進める"""
+        if bounds is None or not self._same_bounds(bounds, self.actual_bounds):
+            self.window_generation += 1
+        self.actual_bounds = bounds
+
+    def _same_bounds(self, bounds, reference, tolerance=2):
+        if bounds is None or reference is None:
+            return False
+        return all(abs(a - b) <= tolerance for a, b in zip(bounds, reference))
+
+    def ensure_focus(self, force=False):
+        """必要な場合だけKindleを再アクティブ化する
+
+        直近 check_interval 秒以内に確認済みならosascriptも実行しない。
+        """
+        if force:
+            return self.activate()
+
+        if self._focused and time.monotonic() - self._last_check < self.check_interval:
+            return True
+
+        try:
+            frontmost, bounds = self.get_state()
+        except Exception as e:
+            logger.warning(f"フォーカス状態の確認に失敗したため再アクティブ化します: {e}")
+            return self.activate()
+
+        if not frontmost:
+            logger.info("Kindleがフォーカスを失っていたため再アクティブ化します")
+            return self.activate()
+
+        # 指定値そのものではなく、前回リサイズ後に実際に収まった位置・サイズと比べる
+        reference = self.actual_bounds or self.window_bounds
+        if not self._same_bounds(bounds, reference):
+            logger.info(f"Kindleウィンドウの位置・サイズが変わっていたため修正します: {bounds}")
+            self.resize()
+
+        self._mark_focused()
+        return True
+
+    def invalidate(self):
+        """フォーカス状態のキャッシュを破棄（ダイアログ表示後など）"""
+        self._focused = False
+        self._last_check = 0.0
+
+    def _mark_focused(self):
+        self._focused = True
+        self._last_check = time.monotonic()